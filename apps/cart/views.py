@@ -3,6 +3,8 @@ Views for the cart app.
 Views para o app de carrinho.
 """
 
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -21,6 +23,20 @@ from .serializers import (
 )
 
 
+def available_stock(product, variation):
+    """
+    Available quantity of a product/variation, or None without a stock row.
+    Quantidade disponível de um produto/variação, ou None sem linha de estoque.
+    """
+    return (
+        Stock.objects.filter(product=product, variation=variation)
+        .values_list(
+            Greatest(F("quantity") - F("reserved_quantity"), Value(0)), flat=True
+        )
+        .first()
+    )
+
+
 class CartMixin:
     """
     Mixin to get or create cart.
@@ -125,15 +141,10 @@ class CartItemView(CartMixin, APIView):
 
         # Check stock
         # Verifica estoque
-        stock = Stock.objects.filter(
-            product=product,
-            variation=variation,
-        ).first()
+        available = available_stock(product, variation)
 
-        if stock and stock.available_quantity < quantity:
-            raise InsufficientStockException(
-                f"Only {stock.available_quantity} items available."
-            )
+        if available is not None and available < quantity:
+            raise InsufficientStockException(f"Only {available} items available.")
 
         # Add or update cart item
         # Adiciona ou atualiza item do carrinho
@@ -196,15 +207,10 @@ class CartItemDetailView(CartMixin, APIView):
 
         # Check stock
         # Verifica estoque
-        stock = Stock.objects.filter(
-            product=cart_item.product,
-            variation=cart_item.variation,
-        ).first()
-
-        if stock and stock.available_quantity < quantity:
-            raise InsufficientStockException(
-                f"Only {stock.available_quantity} items available."
-            )
+        available = available_stock(cart_item.product_id, cart_item.variation_id)
+
+        if available is not None and available < quantity:
+            raise InsufficientStockException(f"Only {available} items available.")
 
         cart_item.quantity = quantity
         cart_item.save()
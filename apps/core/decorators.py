@@ -0,0 +1,74 @@
+"""
+View decorators for the E-commerce API.
+Decorators de views para a API do E-commerce.
+"""
+
+import functools
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .exceptions import IdempotencyConflictException, IdempotencyInProgressException
+
+IDEMPOTENCY_TTL = 60 * 60 * 24  # 24 hours
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds
+
+
+def idempotent(scope: str, ttl: int = IDEMPOTENCY_TTL):
+    """
+    Replay the stored response for a repeated Idempotency-Key header.
+    Repete a resposta armazenada para um cabeçalho Idempotency-Key repetido.
+
+    Keys are scoped per user. Reusing a key with a different request body
+    raises IdempotencyConflictException (422); a concurrent request with the
+    same key raises IdempotencyInProgressException (409). Server errors are
+    not stored, so they can be retried with the same key.
+
+    Apply it above @transaction.atomic so responses are stored after commit.
+    """
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get("Idempotency-Key")
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+
+            key_hash = hashlib.sha256(f"{request.user.pk}:{key}".encode()).hexdigest()
+            cache_key = f"idem:{scope}:{key_hash}"
+            fingerprint = hashlib.sha256(request.body).hexdigest()
+
+            stored = cache.get(cache_key)
+            if stored is not None:
+                if stored["fingerprint"] != fingerprint:
+                    raise IdempotencyConflictException()
+                return Response(
+                    stored["data"],
+                    status=stored["status"],
+                    headers={"Idempotent-Replayed": "true"},
+                )
+
+            lock_key = f"{cache_key}:lock"
+            if not cache.add(lock_key, 1, IDEMPOTENCY_LOCK_TIMEOUT):
+                raise IdempotencyInProgressException()
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    cache.set(
+                        cache_key,
+                        {
+                            "fingerprint": fingerprint,
+                            "status": response.status_code,
+                            "data": response.data,
+                        },
+                        ttl,
+                    )
+                return response
+            finally:
+                cache.delete(lock_key)
+
+        return wrapper
+
+    return decorator
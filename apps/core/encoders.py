@@ -0,0 +1,34 @@
+"""
+orjson-backed JSON encoder/decoder for model JSONFields.
+"""
+
+import json
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class OrjsonEncoder(DjangoJSONEncoder):
+    """
+    JSONField encoder using orjson.
+
+    Types orjson does not handle natively (Decimal, lazy strings) and
+    date/time values fall back to DjangoJSONEncoder.default, so the stored
+    JSON matches what DjangoJSONEncoder produces.
+    """
+
+    def encode(self, o):
+        return orjson.dumps(
+            o,
+            default=self.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+
+
+class OrjsonDecoder(json.JSONDecoder):
+    """
+    JSONField decoder using orjson.
+    """
+
+    def decode(self, s, _w=None):
+        return orjson.loads(s)
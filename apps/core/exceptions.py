@@ -102,6 +102,16 @@ class PaymentFailedException(BusinessLogicException):
     default_code = "payment_failed"
 
 
+class PaymentInProgressException(BusinessLogicException):
+    """
+    Exception raised when another payment attempt for the order is still running.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A payment for this order is already in progress."
+    default_code = "payment_in_progress"
+
+
 class ShippingCalculationException(BusinessLogicException):
     """
     Exception raised when shipping calculation fails.
@@ -109,3 +119,23 @@ class ShippingCalculationException(BusinessLogicException):
 
     default_detail = "Could not calculate shipping for this address."
     default_code = "shipping_calculation_failed"
+
+
+class IdempotencyConflictException(APIException):
+    """
+    Exception raised when an idempotency key is reused with a different request.
+    """
+
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This idempotency key was already used with a different request."
+    default_code = "idempotency_conflict"
+
+
+class IdempotencyInProgressException(APIException):
+    """
+    Exception raised when a request with the same idempotency key is still running.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this idempotency key is already in progress."
+    default_code = "idempotency_in_progress"
@@ -2,7 +2,7 @@
 Custom pagination classes for the E-commerce API.
 """
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -33,3 +33,30 @@ class SmallResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over created_at for large, append-mostly listings.
+
+    Pages are fetched with WHERE created_at < cursor instead of OFFSET, so
+    deep pages cost the same as the first one.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-created_at"
+
+
+class FixedCreatedAtCursorPagination(CreatedAtCursorPagination):
+    """
+    Created_at cursor pagination that ignores ?ordering=.
+
+    For detail actions that page a different model than the view's own
+    (e.g. a product's reviews), where the view's OrderingFilter fields do
+    not apply.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return (self.ordering,)
@@ -0,0 +1,44 @@
+"""
+Shared serializer helpers for the E-commerce API.
+"""
+
+from typing import Iterable, Optional, Set
+
+
+def requested_fields(request) -> Optional[Set[str]]:
+    """
+    Return the field names listed in ?fields=, or None when not given.
+    """
+    if request is None:
+        return None
+    value = request.query_params.get("fields")
+    if not value:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def effective_fields(request, available: Iterable[str]) -> Optional[Set[str]]:
+    """
+    Return the names ?fields= selects from available, or None for all of them.
+
+    Unknown names are ignored; with no known name every field is kept.
+    """
+    requested = requested_fields(request)
+    if not requested:
+        return None
+    return requested & set(available) or None
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin that renders only the fields listed in ?fields=.
+
+    Unknown names are ignored; with no known name every field is kept.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = effective_fields(self.context.get("request"), self.fields)
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
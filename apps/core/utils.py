@@ -3,8 +3,17 @@ Utility functions for the E-commerce Backend.
 """
 
 import re
+import secrets
 from decimal import Decimal
-from typing import Optional
+from functools import reduce
+from operator import or_
+from typing import Iterable, Optional
+
+import requests
+from django.db.models import Q
+from django.utils.text import slugify
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 
 def validate_cpf(cpf: str) -> bool:
@@ -168,11 +177,11 @@ def generate_order_number() -> str:
     Returns:
         Order number in format ORD-YYYY-XXXXXXXX
     """
-    import uuid
     from datetime import datetime
 
+    # Same 32 random bits uuid4().hex[:8] gave, without building a UUID
     year = datetime.now().year
-    unique_id = uuid.uuid4().hex[:8].upper()
+    unique_id = secrets.token_hex(4).upper()
     return f"ORD-{year}-{unique_id}"
 
 
@@ -193,3 +202,95 @@ def calculate_discount_percentage(
         return None
     discount = ((original_price - sale_price) / original_price) * 100
     return int(discount)
+
+
+def _slug_base(obj, source_field: str) -> str:
+    """
+    Slugify source_field, falling back to the SKU or the model name.
+
+    Names made only of symbols slugify to "", which would match every
+    slug in the startswith lookup below.
+    """
+    return (
+        slugify(getattr(obj, source_field))
+        or slugify(getattr(obj, "sku", "") or "")
+        or obj._meta.model_name
+    )
+
+
+def assign_unique_slugs(
+    instances: Iterable, source_field: str = "name", slug_field: str = "slug"
+) -> None:
+    """
+    Fill empty slugs from source_field, avoiding existing slugs.
+
+    Taken slugs for the whole batch are loaded with a single query; a
+    short random suffix is added only when the plain slug is taken.
+
+    Args:
+        instances: Model instances of the same model
+        source_field: Field the slug is built from
+        slug_field: Slug field to fill
+    """
+    pending = [obj for obj in instances if not getattr(obj, slug_field)]
+    if not pending:
+        return
+
+    model = type(pending[0])
+    max_length = model._meta.get_field(slug_field).max_length
+    # Unsaved instances are not hashable, so pair them up in a list
+    bases = [(obj, _slug_base(obj, source_field)[:max_length]) for obj in pending]
+
+    lookups = [Q(**{f"{slug_field}__startswith": base}) for _, base in bases]
+    # _base_manager also sees soft-deleted rows, which still hold their slug
+    taken = set(
+        model._base_manager.filter(reduce(or_, lookups)).values_list(
+            slug_field, flat=True
+        )
+    )
+    for obj, base in bases:
+        slug = base
+        while slug in taken:
+            slug = f"{base[: max_length - 7]}-{secrets.token_hex(3)}"
+        taken.add(slug)
+        setattr(obj, slug_field, slug)
+
+
+def build_http_session(
+    pool_connections: int = 20,
+    pool_maxsize: int = 50,
+    retries: int = 3,
+    backoff_factor: float = 0.2,
+    status_forcelist: Iterable[int] = (429, 500, 502, 503, 504),
+) -> requests.Session:
+    """
+    Build a keep-alive HTTP session for calls to external APIs.
+
+    Connections are pooled and reused across calls and requests, so only the
+    first call per host pays the TCP/TLS handshake. Status retries only apply
+    to idempotent methods, so POSTs are never replayed after a response.
+
+    Args:
+        pool_connections: Number of per-host pools to keep
+        pool_maxsize: Connections kept per host
+        retries: Total retries per request
+        backoff_factor: Backoff between retries, in seconds
+        status_forcelist: Response statuses that trigger a retry
+
+    Returns:
+        requests.Session with the pooled adapter mounted for http and https
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=list(status_forcelist),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
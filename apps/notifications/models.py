@@ -39,6 +39,9 @@ class Notification(TimeStampedModel):
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "is_read", "-created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.email}"
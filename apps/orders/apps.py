@@ -7,3 +7,7 @@ class OrdersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.orders"
     verbose_name = "Orders"
+
+    def ready(self):
+        # Import signals
+        from . import models  # noqa: F401
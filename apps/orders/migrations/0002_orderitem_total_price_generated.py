@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-15 22:54
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0001_initial"),
+    ]
+
+    # Django cannot alter a regular column into a generated one, so the
+    # column is dropped and re-added with the database-side expression.
+    operations = [
+        migrations.RemoveField(
+            model_name="orderitem",
+            name="total_price",
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="total_price",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.F("unit_price"), "*", models.F("quantity")
+                ),
+                output_field=models.DecimalField(
+                    decimal_places=2, max_digits=10, verbose_name="Total Price"
+                ),
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-16 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_orderitem_total_price_generated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="stock_applied_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Stock Applied At"
+            ),
+        ),
+    ]
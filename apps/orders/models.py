@@ -12,22 +12,29 @@ from apps.core.models import BaseModel, TimeStampedModel
 from apps.core.utils import generate_order_number
 
 
+class OrderStatus(models.TextChoices):
+    """
+    Order status values.
+    Valores de status do pedido.
+    """
+
+    PENDING = "pending", "Pending"
+    AWAITING_PAYMENT = "awaiting_payment", "Awaiting Payment"
+    PAID = "paid", "Paid"
+    PROCESSING = "processing", "Processing"
+    SHIPPED = "shipped", "Shipped"
+    DELIVERED = "delivered", "Delivered"
+    CANCELLED = "cancelled", "Cancelled"
+    REFUNDED = "refunded", "Refunded"
+
+
 class Order(BaseModel):
     """
     Order model.
     Modelo de pedido.
     """
 
-    STATUS_CHOICES = [
-        ("pending", "Pending"),
-        ("awaiting_payment", "Awaiting Payment"),
-        ("paid", "Paid"),
-        ("processing", "Processing"),
-        ("shipped", "Shipped"),
-        ("delivered", "Delivered"),
-        ("cancelled", "Cancelled"),
-        ("refunded", "Refunded"),
-    ]
+    STATUS_CHOICES = OrderStatus.choices
 
     # Order identification
     # Identificação do pedido
@@ -50,8 +57,8 @@ class Order(BaseModel):
     status = models.CharField(
         "Status",
         max_length=20,
-        choices=STATUS_CHOICES,
-        default="pending",
+        choices=OrderStatus.choices,
+        default=OrderStatus.PENDING,
         db_index=True,
     )
 
@@ -117,6 +124,14 @@ class Order(BaseModel):
         null=True,
         blank=True,
     )
+    # Set once shipped quantities leave stock, so a retried task is a no-op
+    # Definido quando o estoque é baixado, tornando a tarefa idempotente
+    stock_applied_at = models.DateTimeField(
+        "Stock Applied At",
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     # Notes
     # Notas
@@ -187,10 +202,16 @@ class OrderItem(TimeStampedModel):
         max_digits=10,
         decimal_places=2,
     )
-    total_price = models.DecimalField(
-        "Total Price",
-        max_digits=10,
-        decimal_places=2,
+    # Computed by the database so bulk_create keeps the invariant
+    # Calculado pelo banco para que bulk_create mantenha a invariante
+    total_price = models.GeneratedField(
+        expression=models.F("unit_price") * models.F("quantity"),
+        output_field=models.DecimalField(
+            "Total Price",
+            max_digits=10,
+            decimal_places=2,
+        ),
+        db_persist=True,
     )
 
     class Meta:
@@ -200,10 +221,6 @@ class OrderItem(TimeStampedModel):
     def __str__(self):
         return f"{self.quantity}x {self.product_name}"
 
-    def save(self, *args, **kwargs):
-        self.total_price = self.unit_price * self.quantity
-        super().save(*args, **kwargs)
-
 
 class OrderStatusHistory(TimeStampedModel):
     """
@@ -232,3 +249,30 @@ class OrderStatusHistory(TimeStampedModel):
 
     def __str__(self):
         return f"{self.order.number} - {self.status}"
+
+
+def order_detail_cache_key(user_id, order_id):
+    """
+    Cache key for a serialized order detail.
+    Chave de cache para o detalhe serializado de um pedido.
+    """
+    return f"order:{user_id}:{order_id}"
+
+
+# Signals to invalidate the cached order detail
+# Signals para invalidar o detalhe do pedido em cache
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Order)
+def invalidate_order_detail_cache(sender, instance, created, **kwargs):
+    """
+    Drop the cached order detail once the write is committed.
+    Remove o detalhe do pedido em cache após o commit da escrita.
+    """
+    if not created:
+        key = order_detail_cache_key(instance.user_id, instance.pk)
+        transaction.on_commit(lambda: cache.delete(key))
@@ -6,15 +6,20 @@ from rest_framework import serializers
 
 from apps.products.serializers import ProductListSerializer
 
-from .models import Order, OrderItem, OrderStatusHistory
+from .models import Order, OrderItem, OrderStatus, OrderStatusHistory
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
     """
     Serializer for order items.
+    Uses the product snapshot columns; `product` is the product id.
     """
 
-    product = ProductListSerializer(read_only=True)
+    total_price = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        read_only=True,
+    )
 
     class Meta:
         model = OrderItem
@@ -28,6 +33,15 @@ class OrderItemSerializer(serializers.ModelSerializer):
             "unit_price",
             "total_price",
         ]
+        read_only_fields = fields
+
+
+class OrderItemExpandedSerializer(OrderItemSerializer):
+    """
+    Serializer for order items with the nested product (?expand=product).
+    """
+
+    product = ProductListSerializer(read_only=True)
 
 
 class OrderStatusHistorySerializer(serializers.ModelSerializer):
@@ -64,9 +78,30 @@ class OrderListSerializer(serializers.ModelSerializer):
         ]
 
     def get_item_count(self, obj):
+        if hasattr(obj, "item_count_db"):
+            return obj.item_count_db
         return obj.items.count()
 
 
+class OrderCreatedSerializer(serializers.ModelSerializer):
+    """
+    Thin serializer for the checkout response (no related lookups).
+    """
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "number",
+            "status",
+            "subtotal",
+            "shipping_cost",
+            "discount",
+            "total",
+            "created_at",
+        ]
+
+
 class OrderDetailSerializer(serializers.ModelSerializer):
     """
     Full serializer for order details.
@@ -100,6 +135,15 @@ class OrderDetailSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is not None:
+            expand = request.query_params.get("expand", "").split(",")
+            if "product" in expand:
+                fields["items"] = OrderItemExpandedSerializer(many=True, read_only=True)
+        return fields
+
 
 class CheckoutSerializer(serializers.Serializer):
     """
@@ -118,6 +162,6 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
     Serializer for updating order status (admin).
     """
 
-    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    status = serializers.ChoiceField(choices=OrderStatus.choices)
     notes = serializers.CharField(required=False, allow_blank=True)
     tracking_code = serializers.CharField(required=False, allow_blank=True)
@@ -5,6 +5,7 @@ Celery tasks for the orders app.
 from celery import shared_task
 from django.conf import settings
 from django.core.mail import send_mail
+from django.template.loader import render_to_string
 
 
 @shared_task
@@ -15,37 +16,17 @@ def send_order_confirmation_email(order_id: int):
     from .models import Order
 
     try:
-        order = Order.objects.get(id=order_id)
+        order = (
+            Order.objects.select_related("user")
+            .prefetch_related("items")
+            .get(id=order_id)
+        )
     except Order.DoesNotExist:
         return
 
-    items_list = "\n".join(
-        f"- {item.quantity}x {item.product_name}: R$ {item.total_price}"
-        for item in order.items.all()
-    )
-
     send_mail(
         subject=f"Order Confirmation - {order.number}",
-        message=f"""
-        Hi {order.user.first_name or 'there'},
-
-        Thank you for your order!
-
-        Order Number: {order.number}
-
-        Items:
-        {items_list}
-
-        Subtotal: R$ {order.subtotal}
-        Shipping: R$ {order.shipping_cost}
-        Discount: R$ {order.discount}
-        Total: R$ {order.total}
-
-        We'll notify you when your order ships.
-
-        Best regards,
-        E-commerce Team
-        """,
+        message=render_to_string("emails/order_confirmation.txt", {"order": order}),
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[order.user.email],
         fail_silently=False,
@@ -60,28 +41,68 @@ def send_order_shipped_email(order_id: int):
     from .models import Order
 
     try:
-        order = Order.objects.get(id=order_id)
+        order = Order.objects.select_related("user").get(id=order_id)
     except Order.DoesNotExist:
         return
 
     send_mail(
         subject=f"Your Order {order.number} Has Shipped!",
-        message=f"""
-        Hi {order.user.first_name or 'there'},
-
-        Great news! Your order has shipped.
-
-        Order Number: {order.number}
-        Tracking Code: {order.tracking_code}
-
-        Track your package at: https://www.correios.com.br/rastreamento/{order.tracking_code}
-
-        Estimated delivery: {order.estimated_delivery or 'N/A'}
-
-        Best regards,
-        E-commerce Team
-        """,
+        message=render_to_string("emails/order_shipped.txt", {"order": order}),
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[order.user.email],
         fail_silently=False,
     )
+
+
+@shared_task
+def apply_shipment_stock(order_id: int):
+    """
+    Deduct shipped quantities from stock and release their reservation.
+
+    Runs at most once per order: the order row is locked and marked in the
+    same transaction as the stock updates.
+    """
+    from collections import defaultdict
+
+    from django.db import transaction
+    from django.db.models import F, Value
+    from django.db.models.functions import Greatest
+    from django.utils import timezone
+
+    from apps.products.models import Stock, update_stock_totals
+
+    from .models import Order, OrderItem
+
+    with transaction.atomic():
+        order = (
+            Order.objects.select_for_update()
+            .filter(id=order_id, stock_applied_at__isnull=True)
+            .only("id")
+            .first()
+        )
+        if order is None:
+            return
+
+        # Group quantities per stock row so each SKU gets a single UPDATE
+        quantities = defaultdict(int)
+        for product_id, variation_id, quantity in OrderItem.objects.filter(
+            order_id=order_id
+        ).values_list("product_id", "variation_id", "quantity"):
+            quantities[(product_id, variation_id)] += quantity
+
+        for (product_id, variation_id), quantity in quantities.items():
+            Stock.objects.filter(
+                product_id=product_id,
+                variation_id=variation_id,
+            ).update(
+                quantity=Greatest(F("quantity") - quantity, Value(0)),
+                reserved_quantity=Greatest(
+                    F("reserved_quantity") - quantity, Value(0)
+                ),
+            )
+
+        order.stock_applied_at = timezone.now()
+        order.save(update_fields=["stock_applied_at"])
+
+        # update() sends no signals
+        update_stock_totals({product_id for product_id, _ in quantities})
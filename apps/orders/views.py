@@ -3,7 +3,10 @@ Views for the orders app.
 Views para o app de pedidos.
 """
 
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, F
+from django.urls import reverse
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -13,17 +16,24 @@ from apps.accounts.models import Address
 from apps.cart.models import Cart
 from apps.core.exceptions import BusinessLogicException, CartEmptyException
 from apps.core.permissions import IsAdminUser, IsOwner
-from apps.coupons.models import CouponUsage
+from apps.coupons.models import Coupon, CouponUsage
 from apps.products.models import Stock
 
-from .models import Order, OrderItem, OrderStatusHistory
+from .models import Order, OrderItem, OrderStatusHistory, order_detail_cache_key
 from .serializers import (
     CheckoutSerializer,
+    OrderCreatedSerializer,
     OrderDetailSerializer,
     OrderListSerializer,
     OrderStatusUpdateSerializer,
 )
-from .tasks import send_order_confirmation_email
+from .tasks import (
+    apply_shipment_stock,
+    send_order_confirmation_email,
+    send_order_shipped_email,
+)
+
+ORDER_DETAIL_CACHE_TIMEOUT = 60  # seconds
 
 
 class CheckoutView(APIView):
@@ -46,7 +56,7 @@ class CheckoutView(APIView):
         except Cart.DoesNotExist:
             raise CartEmptyException()
 
-        if cart.items.count() == 0:
+        if not cart.items.exists():
             raise CartEmptyException()
 
         # Get addresses
@@ -108,35 +118,43 @@ class CheckoutView(APIView):
 
         # Create order items and update stock
         # Cria itens do pedido e atualiza estoque
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                variation=cart_item.variation,
-                product_name=cart_item.product.name,
-                product_sku=cart_item.product.sku,
-                variation_name=cart_item.variation.name if cart_item.variation else "",
-                quantity=cart_item.quantity,
-                unit_price=cart_item.unit_price,
-                total_price=cart_item.total_price,
+        cart_items = list(cart.items.select_related("product", "variation"))
+        stocks = {
+            (stock.product_id, stock.variation_id): stock
+            for stock in Stock.objects.filter(
+                product_id__in={item.product_id for item in cart_items}
+            )
+        }
+
+        order_items = []
+        for cart_item in cart_items:
+            order_items.append(
+                OrderItem(
+                    order=order,
+                    product=cart_item.product,
+                    variation=cart_item.variation,
+                    product_name=cart_item.product.name,
+                    product_sku=cart_item.product.sku,
+                    variation_name=cart_item.variation.name if cart_item.variation else "",
+                    quantity=cart_item.quantity,
+                    unit_price=cart_item.unit_price,
+                )
             )
 
             # Reserve stock
             # Reserva estoque
-            stock = Stock.objects.filter(
-                product=cart_item.product,
-                variation=cart_item.variation,
-            ).first()
-
+            stock = stocks.get((cart_item.product_id, cart_item.variation_id))
             if stock:
                 stock.reserved_quantity += cart_item.quantity
-                stock.save()
+                stock.save(update_fields=["reserved_quantity", "updated_at"])
 
             # Increment order count on product
             # Incrementa contagem de pedidos no produto
             cart_item.product.order_count += cart_item.quantity
             cart_item.product.save(update_fields=["order_count"])
 
+        OrderItem.objects.bulk_create(order_items)
+
         # Record coupon usage
         # Registra uso do cupom
         if cart.coupon:
@@ -145,8 +163,9 @@ class CheckoutView(APIView):
                 user=request.user,
                 order=order,
             )
-            cart.coupon.times_used += 1
-            cart.coupon.save(update_fields=["times_used"])
+            Coupon.objects.filter(pk=cart.coupon_id).update(
+                times_used=F("times_used") + 1
+            )
 
         # Create initial status history
         # Cria histórico inicial de status
@@ -163,15 +182,18 @@ class CheckoutView(APIView):
 
         # Send confirmation email
         # Envia email de confirmação
-        send_order_confirmation_email.delay(order.id)
+        transaction.on_commit(lambda: send_order_confirmation_email.delay(order.id))
 
+        # Full details are served by the order detail endpoint
+        # Detalhes completos são servidos pelo endpoint de detalhe do pedido
         return Response(
             {
                 "success": True,
                 "message": "Order created successfully.",
-                "data": OrderDetailSerializer(order).data,
+                "data": OrderCreatedSerializer(order).data,
             },
             status=status.HTTP_201_CREATED,
+            headers={"Location": reverse("api_v1:order-detail", args=[order.id])},
         )
 
 
@@ -184,7 +206,12 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        queryset = Order.objects.filter(user=self.request.user)
+        if self.action == "list":
+            # Item counts come from one GROUP BY instead of a COUNT per order
+            # Contagens de itens vêm de um GROUP BY em vez de um COUNT por pedido
+            queryset = queryset.annotate(item_count_db=Count("items"))
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -192,8 +219,19 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
         return OrderListSerializer
 
     def retrieve(self, request, *args, **kwargs):
+        # Only the default shape is cached; ?expand=... is rendered fresh
+        # Apenas o formato padrão é cacheado; ?expand=... é renderizado sempre
+        cache_key = None
+        if not request.query_params.get("expand"):
+            cache_key = order_detail_cache_key(request.user.id, kwargs["pk"])
+            data = cache.get(cache_key)
+            if data is not None:
+                return Response({"success": True, "data": data})
+
         instance = self.get_object()
         serializer = self.get_serializer(instance)
+        if cache_key:
+            cache.set(cache_key, serializer.data, ORDER_DETAIL_CACHE_TIMEOUT)
         return Response({"success": True, "data": serializer.data})
 
     @action(detail=True, methods=["post"])
@@ -213,19 +251,23 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
         with transaction.atomic():
             # Release reserved stock
             # Libera estoque reservado
-            for item in order.items.all():
-                stock = Stock.objects.filter(
-                    product=item.product,
-                    variation=item.variation,
-                ).first()
+            items = list(order.items.only("product_id", "variation_id", "quantity"))
+            stocks = {
+                (stock.product_id, stock.variation_id): stock
+                for stock in Stock.objects.filter(
+                    product_id__in={item.product_id for item in items}
+                )
+            }
+            for item in items:
+                stock = stocks.get((item.product_id, item.variation_id))
                 if stock:
                     stock.reserved_quantity = max(
                         0, stock.reserved_quantity - item.quantity
                     )
-                    stock.save()
+                    stock.save(update_fields=["reserved_quantity", "updated_at"])
 
             order.status = "cancelled"
-            order.save()
+            order.save(update_fields=["status", "updated_at"])
 
             OrderStatusHistory.objects.create(
                 order=order,
@@ -253,6 +295,12 @@ class OrderAdminViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     permission_classes = [IsAdminUser]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = queryset.annotate(item_count_db=Count("items"))
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return OrderDetailSerializer
@@ -306,9 +354,11 @@ class OrderAdminViewSet(viewsets.ModelViewSet):
 
         with transaction.atomic():
             order.status = new_status
+            update_fields = ["status", "updated_at"]
             if tracking_code:
                 order.tracking_code = tracking_code
-            order.save()
+                update_fields.append("tracking_code")
+            order.save(update_fields=update_fields)
 
             OrderStatusHistory.objects.create(
                 order=order,
@@ -317,18 +367,11 @@ class OrderAdminViewSet(viewsets.ModelViewSet):
                 created_by=request.user,
             )
 
-            # Handle stock on status changes
-            # Lida com estoque em mudanças de status
-            if new_status == "shipped":
-                for item in order.items.all():
-                    stock = Stock.objects.filter(
-                        product=item.product,
-                        variation=item.variation,
-                    ).first()
-                    if stock:
-                        stock.quantity -= item.quantity
-                        stock.reserved_quantity -= item.quantity
-                        stock.save()
+        # Handle stock and notification on shipment in the background
+        # Lida com estoque e notificação do envio em segundo plano
+        if new_status == "shipped":
+            transaction.on_commit(lambda: apply_shipment_stock.delay(order.id))
+            transaction.on_commit(lambda: send_order_shipped_email.delay(order.id))
 
         return Response(
             {
@@ -1 +1,24 @@
 """Payment gateways module."""
+
+from functools import lru_cache
+
+from .base import BasePaymentGateway
+from .mercadopago import MercadoPagoGateway
+from .stripe import StripeGateway
+
+GATEWAYS = {
+    "mercadopago": MercadoPagoGateway,
+    "stripe": StripeGateway,
+    # "pagseguro": PagSeguroGateway,
+}
+
+
+@lru_cache(maxsize=None)
+def get_gateway(name: str) -> BasePaymentGateway:
+    """
+    Return the process-wide gateway instance for a gateway name.
+
+    Raises:
+        KeyError: If the gateway is not supported
+    """
+    return GATEWAYS[name]()
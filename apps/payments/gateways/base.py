@@ -3,9 +3,31 @@ Base payment gateway interface.
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+
+# (connect, read) timeouts in seconds for gateway API calls
+HTTP_TIMEOUT = (5, 25)
+
+GATEWAY_UNAVAILABLE_MESSAGE = (
+    "Temporary problem with the payment provider. Please try again."
+)
+
+# Keys of PaymentResult.data worth persisting as Payment.gateway_response.
+# PIX/boleto payloads already have their own columns and are left out.
+GATEWAY_RESPONSE_FIELDS = frozenset(
+    {
+        "id",
+        "status",
+        "gateway_status",
+        "amount",
+        "fee_details",
+        "last_payment_error",
+    }
+)
 
 
 @dataclass
@@ -19,6 +41,14 @@ class PaymentResult:
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+    def gateway_response(self) -> Dict[str, Any]:
+        """Return the subset of data that is stored with the payment."""
+        return {
+            key: value
+            for key, value in (self.data or {}).items()
+            if key in GATEWAY_RESPONSE_FIELDS
+        }
+
 
 @dataclass
 class RefundResult:
@@ -76,14 +106,14 @@ class BasePaymentGateway(ABC):
     @abstractmethod
     def process_webhook(
         self,
-        payload: Dict[str, Any],
+        payload: bytes,
         signature: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Process webhook notification from gateway.
 
         Args:
-            payload: Webhook payload
+            payload: Raw webhook request body
             signature: Webhook signature for verification
 
         Returns:
@@ -111,10 +141,37 @@ class BasePaymentGateway(ABC):
         """
         pass
 
+    def get_payment_status_batch(
+        self,
+        payment_ids: List[str],
+        max_workers: int = 10,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the status of several payments at once.
+
+        The lookups run concurrently over the shared keep-alive session, so
+        N statuses cost roughly one round-trip instead of N sequential ones.
+
+        Args:
+            payment_ids: Gateway payment IDs
+            max_workers: Maximum concurrent gateway requests
+
+        Returns:
+            Dictionary mapping each payment ID to its status dictionary
+        """
+        unique_ids = list(dict.fromkeys(payment_ids))
+        if not unique_ids:
+            return {}
+
+        workers = min(max_workers, len(unique_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(self.get_payment_status, unique_ids)
+            return dict(zip(unique_ids, results))
+
     def _format_amount(self, amount: Decimal) -> int:
         """Convert decimal amount to cents (integer)."""
         return int(amount * 100)
 
     def _parse_amount(self, amount_cents: int) -> Decimal:
         """Convert cents to decimal amount."""
-        return Decimal(amount_cents) / 100
+        return Decimal(amount_cents).scaleb(-2)
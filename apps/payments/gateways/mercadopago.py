@@ -2,16 +2,93 @@
 Mercado Pago payment gateway integration.
 """
 
+import hashlib
+import hmac
 import logging
 from decimal import Decimal
+from types import MappingProxyType
 from typing import Any, Dict, Optional
 
+import orjson
+import requests
 from django.conf import settings
+from mercadopago.config.request_options import RequestOptions
+from mercadopago.http.http_client import HttpClient
 
-from .base import BasePaymentGateway, PaymentResult, RefundResult
+from apps.core.utils import build_http_session
+
+from .base import (
+    GATEWAY_UNAVAILABLE_MESSAGE,
+    HTTP_TIMEOUT,
+    BasePaymentGateway,
+    PaymentResult,
+    RefundResult,
+)
 
 logger = logging.getLogger(__name__)
 
+# Shared default for missing nested response objects
+_EMPTY = MappingProxyType({})
+
+# Mercado Pago status -> internal payment status
+_STATUS_MAP = MappingProxyType(
+    {
+        "pending": "pending",
+        "approved": "approved",
+        "authorized": "processing",
+        "in_process": "processing",
+        "in_mediation": "processing",
+        "rejected": "rejected",
+        "cancelled": "cancelled",
+        "refunded": "refunded",
+        "charged_back": "refunded",
+    }
+)
+
+
+def _build_pix(payment_data: Dict[str, Any], options: Dict[str, Any]) -> None:
+    payment_data["payment_method_id"] = "pix"
+
+
+def _build_credit_card(payment_data: Dict[str, Any], options: Dict[str, Any]) -> None:
+    payment_data["token"] = options.get("card_token")
+    payment_data["installments"] = options.get("installments", 1)
+    payment_data["payment_method_id"] = options.get("payment_method_id")
+
+
+def _build_boleto(payment_data: Dict[str, Any], options: Dict[str, Any]) -> None:
+    payment_data["payment_method_id"] = "bolbradesco"
+
+
+# Payment method -> function adding its fields to the payment request
+_METHOD_BUILDERS = MappingProxyType(
+    {
+        "pix": _build_pix,
+        "credit_card": _build_credit_card,
+        "boleto": _build_boleto,
+    }
+)
+
+
+class PooledHttpClient(HttpClient):
+    """
+    Mercado Pago HTTP client backed by a shared keep-alive session.
+
+    The SDK default client opens a new session (and TCP/TLS connection)
+    for every API call.
+    """
+
+    session = build_http_session()
+
+    def request(self, method, url, maxretries=None, **kwargs):
+        # Replace the SDK's 60s single timeout with (connect, read) limits
+        kwargs["timeout"] = HTTP_TIMEOUT
+        api_result = self.session.request(method, url, **kwargs)
+        return {
+            "status": api_result.status_code,
+            "response": api_result.json(),
+        }
+
 
 class MercadoPagoGateway(BasePaymentGateway):
     """
@@ -20,6 +97,7 @@ class MercadoPagoGateway(BasePaymentGateway):
 
     def __init__(self):
         self.access_token = settings.MERCADOPAGO_ACCESS_TOKEN
+        self.webhook_secret = settings.MERCADOPAGO_WEBHOOK_SECRET
         self._sdk = None
 
     @property
@@ -28,7 +106,10 @@ class MercadoPagoGateway(BasePaymentGateway):
         if self._sdk is None:
             import mercadopago
 
-            self._sdk = mercadopago.SDK(self.access_token)
+            self._sdk = mercadopago.SDK(
+                self.access_token,
+                http_client=PooledHttpClient(),
+            )
         return self._sdk
 
     def create_payment(
@@ -40,6 +121,14 @@ class MercadoPagoGateway(BasePaymentGateway):
         **kwargs,
     ) -> PaymentResult:
         """Create a payment with Mercado Pago."""
+        build_method_data = _METHOD_BUILDERS.get(payment_method)
+        if build_method_data is None:
+            return PaymentResult(
+                success=False,
+                status="rejected",
+                message=f"Payment method {payment_method} not supported.",
+            )
+
         try:
             payment_data = {
                 "transaction_amount": float(amount),
@@ -56,19 +145,21 @@ class MercadoPagoGateway(BasePaymentGateway):
                 },
             }
 
-            if payment_method == "pix":
-                payment_data["payment_method_id"] = "pix"
-            elif payment_method == "credit_card":
-                payment_data["token"] = kwargs.get("card_token")
-                payment_data["installments"] = kwargs.get("installments", 1)
-                payment_data["payment_method_id"] = kwargs.get("payment_method_id")
-            elif payment_method == "boleto":
-                payment_data["payment_method_id"] = "bolbradesco"
+            build_method_data(payment_data, kwargs)
+
+            request_options = None
+            if kwargs.get("idempotency_key"):
+                request_options = RequestOptions(
+                    custom_headers={"X-Idempotency-Key": kwargs["idempotency_key"]}
+                )
 
-            result = self.sdk.payment().create(payment_data)
+            result = self.sdk.payment().create(payment_data, request_options)
 
             if result["status"] == 201:
                 response = result["response"]
+                pix_data = response.get("point_of_interaction", _EMPTY).get(
+                    "transaction_data", _EMPTY
+                )
                 return PaymentResult(
                     success=True,
                     payment_id=str(response["id"]),
@@ -76,16 +167,14 @@ class MercadoPagoGateway(BasePaymentGateway):
                     message="Payment created successfully",
                     data={
                         "gateway_status": response["status"],
-                        "pix_qr_code": response.get("point_of_interaction", {})
-                        .get("transaction_data", {})
-                        .get("qr_code"),
-                        "pix_qr_code_base64": response.get("point_of_interaction", {})
-                        .get("transaction_data", {})
-                        .get("qr_code_base64"),
-                        "boleto_url": response.get("transaction_details", {}).get(
+                        "pix_qr_code": pix_data.get("qr_code"),
+                        "pix_qr_code_base64": pix_data.get("qr_code_base64"),
+                        "boleto_url": response.get("transaction_details", _EMPTY).get(
                             "external_resource_url"
                         ),
-                        "boleto_barcode": response.get("barcode", {}).get("content"),
+                        "boleto_barcode": response.get("barcode", _EMPTY).get(
+                            "content"
+                        ),
                     },
                 )
             else:
@@ -96,6 +185,16 @@ class MercadoPagoGateway(BasePaymentGateway):
                     error=str(result),
                 )
 
+        except requests.RequestException as e:
+            logger.warning(
+                "Mercado Pago unreachable", extra={"order_id": order_id, "err": str(e)}
+            )
+            return PaymentResult(
+                success=False,
+                status="error",
+                message=GATEWAY_UNAVAILABLE_MESSAGE,
+                error=str(e),
+            )
         except Exception as e:
             logger.exception("Mercado Pago payment error")
             return PaymentResult(
@@ -110,16 +209,7 @@ class MercadoPagoGateway(BasePaymentGateway):
         try:
             result = self.sdk.payment().get(payment_id)
             if result["status"] == 200:
-                response = result["response"]
-                return {
-                    "id": response["id"],
-                    "status": self._map_status(response["status"]),
-                    "gateway_status": response["status"],
-                    "amount": Decimal(str(response["transaction_amount"])),
-                    "fee": Decimal(
-                        str(response.get("fee_details", [{}])[0].get("amount", 0))
-                    ),
-                }
+                return self._parse_payment(result["response"])
             return {"error": "Payment not found"}
         except Exception as e:
             logger.exception("Mercado Pago status check error")
@@ -127,19 +217,40 @@ class MercadoPagoGateway(BasePaymentGateway):
 
     def process_webhook(
         self,
-        payload: Dict[str, Any],
+        payload: bytes,
         signature: Optional[str] = None,
+        request_id: str = "",
     ) -> Dict[str, Any]:
         """Process Mercado Pago webhook."""
         try:
+            payload = orjson.loads(payload or b"{}")
             action = payload.get("action")
             data = payload.get("data", {})
             payment_id = data.get("id")
 
+            if not self.webhook_secret:
+                # Fail closed: unsigned webhooks are only accepted in DEBUG
+                if not settings.DEBUG:
+                    logger.error("MERCADOPAGO_WEBHOOK_SECRET is not set")
+                    return {"error": "Webhook secret not configured"}
+            elif not self._verify_signature(payment_id, signature, request_id):
+                logger.warning(
+                    "Mercado Pago webhook signature verification failed",
+                    extra={"payment_id": payment_id, "request_id": request_id},
+                )
+                return {"error": "Invalid signature"}
+
             if action == "payment.updated" and payment_id:
+                # The signature covers only the id, so the status is always
+                # read back from the API rather than trusted from the body
                 return self.get_payment_status(str(payment_id))
 
             return {"action": action, "data": data}
+        except orjson.JSONDecodeError as e:
+            logger.warning(
+                "Mercado Pago webhook payload invalid", extra={"err": str(e)}
+            )
+            return {"error": "Invalid payload"}
         except Exception as e:
             logger.exception("Mercado Pago webhook error")
             return {"error": str(e)}
@@ -183,17 +294,51 @@ class MercadoPagoGateway(BasePaymentGateway):
                 error=str(e),
             )
 
+    def _verify_signature(
+        self,
+        data_id: Any,
+        signature: Optional[str],
+        request_id: str,
+    ) -> bool:
+        """
+        Verify the x-signature header ("ts=...,v1=...").
+
+        v1 is the HMAC-SHA256 of the "id:...;request-id:...;ts:...;" manifest
+        signed with the webhook secret.
+        """
+        if not signature:
+            return False
+        parts = dict(
+            part.strip().split("=", 1) for part in signature.split(",") if "=" in part
+        )
+        ts, v1 = parts.get("ts"), parts.get("v1")
+        if not ts or not v1:
+            return False
+
+        manifest = ""
+        if data_id is not None:
+            manifest += f"id:{str(data_id).lower()};"
+        if request_id:
+            manifest += f"request-id:{request_id};"
+        manifest += f"ts:{ts};"
+
+        expected = hmac.new(
+            self.webhook_secret.encode(), manifest.encode(), hashlib.sha256
+        ).hexdigest()
+        return hmac.compare_digest(expected, v1)
+
+    def _parse_payment(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the payment status dict from a Mercado Pago payment object."""
+        return {
+            "id": response["id"],
+            "status": self._map_status(response["status"]),
+            "gateway_status": response["status"],
+            "amount": self._parse_amount(round(response["transaction_amount"] * 100)),
+            "fee": self._parse_amount(
+                round((response.get("fee_details") or [{}])[0].get("amount", 0) * 100)
+            ),
+        }
+
     def _map_status(self, gateway_status: str) -> str:
         """Map Mercado Pago status to internal status."""
-        status_map = {
-            "pending": "pending",
-            "approved": "approved",
-            "authorized": "processing",
-            "in_process": "processing",
-            "in_mediation": "processing",
-            "rejected": "rejected",
-            "cancelled": "cancelled",
-            "refunded": "refunded",
-            "charged_back": "refunded",
-        }
-        return status_map.get(gateway_status, "pending")
+        return _STATUS_MAP.get(gateway_status, "pending")
@@ -2,16 +2,51 @@
 Stripe payment gateway integration.
 """
 
+import hashlib
 import logging
 from decimal import Decimal
+from types import MappingProxyType
 from typing import Any, Dict, Optional
 
+import stripe
 from django.conf import settings
+from django.core.cache import cache
 
-from .base import BasePaymentGateway, PaymentResult, RefundResult
+from apps.core.utils import build_http_session
+
+from .base import (
+    GATEWAY_UNAVAILABLE_MESSAGE,
+    HTTP_TIMEOUT,
+    BasePaymentGateway,
+    PaymentResult,
+    RefundResult,
+)
 
 logger = logging.getLogger(__name__)
 
+# Stripe status -> internal payment status
+_STATUS_MAP = MappingProxyType(
+    {
+        "requires_payment_method": "pending",
+        "requires_confirmation": "pending",
+        "requires_action": "pending",
+        "processing": "processing",
+        "requires_capture": "processing",
+        "succeeded": "approved",
+        "canceled": "cancelled",
+    }
+)
+
+# Configure the SDK once per process, with a shared keep-alive session
+stripe.api_key = settings.STRIPE_SECRET_KEY
+stripe.default_http_client = stripe.RequestsClient(
+    timeout=HTTP_TIMEOUT,
+    session=build_http_session(),
+)
+stripe.max_network_retries = 2
+
+CUSTOMER_CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
+
 
 class StripeGateway(BasePaymentGateway):
     """
@@ -19,9 +54,6 @@ class StripeGateway(BasePaymentGateway):
     """
 
     def __init__(self):
-        import stripe
-
-        stripe.api_key = settings.STRIPE_SECRET_KEY
         self.stripe = stripe
 
     def create_payment(
@@ -35,13 +67,13 @@ class StripeGateway(BasePaymentGateway):
         """Create a payment with Stripe."""
         try:
             # Create or get customer
-            customer = self._get_or_create_customer(customer_data)
+            customer_id = self._get_or_create_customer(customer_data)
 
             # Create payment intent
             intent = self.stripe.PaymentIntent.create(
                 amount=self._format_amount(amount),
                 currency="brl",
-                customer=customer.id,
+                customer=customer_id,
                 payment_method=kwargs.get("payment_method_id"),
                 confirm=True,
                 automatic_payment_methods={
@@ -51,6 +83,7 @@ class StripeGateway(BasePaymentGateway):
                 metadata={
                     "order_id": str(order_id),
                 },
+                idempotency_key=kwargs.get("idempotency_key"),
             )
 
             return PaymentResult(
@@ -65,12 +98,26 @@ class StripeGateway(BasePaymentGateway):
             )
 
         except self.stripe.error.CardError as e:
+            logger.warning(
+                "Stripe card declined",
+                extra={"order_id": order_id, "decline_code": e.code, "err": str(e)},
+            )
             return PaymentResult(
                 success=False,
                 status="rejected",
                 message=str(e.user_message),
                 error=str(e),
             )
+        except self.stripe.error.APIConnectionError as e:
+            logger.warning(
+                "Stripe unreachable", extra={"order_id": order_id, "err": str(e)}
+            )
+            return PaymentResult(
+                success=False,
+                status="error",
+                message=GATEWAY_UNAVAILABLE_MESSAGE,
+                error=str(e),
+            )
         except Exception as e:
             logger.exception("Stripe payment error")
             return PaymentResult(
@@ -96,11 +143,12 @@ class StripeGateway(BasePaymentGateway):
 
     def process_webhook(
         self,
-        payload: Dict[str, Any],
+        payload: bytes,
         signature: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Process Stripe webhook."""
         try:
+            # Signature is verified against the raw body bytes
             event = self.stripe.Webhook.construct_event(
                 payload,
                 signature,
@@ -123,11 +171,22 @@ class StripeGateway(BasePaymentGateway):
                     "error": intent.get("last_payment_error", {}).get("message"),
                 }
 
+            elif event["type"] == "customer.deleted":
+                customer = event["data"]["object"]
+                if customer.get("email"):
+                    cache.delete(self._customer_cache_key(customer["email"]))
+
             return {"type": event["type"]}
 
         except self.stripe.error.SignatureVerificationError as e:
-            logger.error("Stripe webhook signature verification failed")
+            logger.warning(
+                "Stripe webhook signature verification failed",
+                extra={"err": str(e)},
+            )
             return {"error": "Invalid signature"}
+        except ValueError as e:
+            logger.warning("Stripe webhook payload invalid", extra={"err": str(e)})
+            return {"error": "Invalid payload"}
         except Exception as e:
             logger.exception("Stripe webhook error")
             return {"error": str(e)}
@@ -164,29 +223,41 @@ class StripeGateway(BasePaymentGateway):
                 error=str(e),
             )
 
-    def _get_or_create_customer(self, customer_data: Dict[str, Any]):
-        """Get or create a Stripe customer."""
-        # Search for existing customer
-        customers = self.stripe.Customer.list(email=customer_data.get("email"), limit=1)
+    def _customer_cache_key(self, email: str) -> str:
+        """Cache key for the Stripe customer ID of an email."""
+        return f"stripe:cust:{hashlib.sha1(email.encode()).hexdigest()}"
+
+    def _customer_idempotency_key(self, email: str, name: str) -> str:
+        """Idempotency key for creating the Stripe customer of an email."""
+        digest = hashlib.sha1(f"{email}|{name}".encode()).hexdigest()
+        return f"stripe:customer:create:{digest}"
+
+    def _get_or_create_customer(self, customer_data: Dict[str, Any]) -> str:
+        """Get or create a Stripe customer and return its ID."""
+        email = customer_data.get("email")
+        cache_key = self._customer_cache_key(email or "")
+
+        customer_id = cache.get(cache_key)
+        if customer_id:
+            return customer_id
+
+        # Cache miss: look the customer up on Stripe before creating one
+        customers = self.stripe.Customer.list(email=email, limit=1)
 
         if customers.data:
-            return customers.data[0]
+            customer_id = customers.data[0].id
+        else:
+            # Create new customer; the key dedupes concurrent first checkouts
+            name = f"{customer_data.get('first_name', '')} {customer_data.get('last_name', '')}".strip()
+            customer_id = self.stripe.Customer.create(
+                email=email,
+                name=name,
+                idempotency_key=self._customer_idempotency_key(email or "", name),
+            ).id
 
-        # Create new customer
-        return self.stripe.Customer.create(
-            email=customer_data.get("email"),
-            name=f"{customer_data.get('first_name', '')} {customer_data.get('last_name', '')}".strip(),
-        )
+        cache.set(cache_key, customer_id, CUSTOMER_CACHE_TIMEOUT)
+        return customer_id
 
     def _map_status(self, gateway_status: str) -> str:
         """Map Stripe status to internal status."""
-        status_map = {
-            "requires_payment_method": "pending",
-            "requires_confirmation": "pending",
-            "requires_action": "pending",
-            "processing": "processing",
-            "requires_capture": "processing",
-            "succeeded": "approved",
-            "canceled": "cancelled",
-        }
-        return status_map.get(gateway_status, "pending")
+        return _STATUS_MAP.get(gateway_status, "pending")
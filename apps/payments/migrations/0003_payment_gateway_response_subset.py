@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:05
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0002_payment_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="gateway_response",
+            field=models.JSONField(
+                blank=True,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                help_text="Whitelisted subset of the gateway response",
+                null=True,
+                verbose_name="Gateway Response",
+            ),
+        ),
+    ]
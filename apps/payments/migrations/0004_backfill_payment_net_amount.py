@@ -0,0 +1,20 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_net_amount(apps, schema_editor):
+    Payment = apps.get_model("payments", "Payment")
+    Payment.objects.filter(net_amount__isnull=True).update(
+        net_amount=F("amount") - F("fee")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0003_payment_gateway_response_subset"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_net_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0004_backfill_payment_net_amount"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="paymenttransaction",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("gateway_transaction_id", ""), _negated=True),
+                fields=("payment", "gateway_transaction_id"),
+                name="paytx_payment_gwtx_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:27
+
+import apps.core.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0005_paymenttransaction_unique_gateway_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="gateway_response",
+            field=models.JSONField(
+                blank=True,
+                decoder=apps.core.encoders.OrjsonDecoder,
+                encoder=apps.core.encoders.OrjsonEncoder,
+                help_text="Whitelisted subset of the gateway response",
+                null=True,
+                verbose_name="Gateway Response",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="paymenttransaction",
+            name="gateway_response",
+            field=models.JSONField(
+                blank=True,
+                decoder=apps.core.encoders.OrjsonDecoder,
+                encoder=apps.core.encoders.OrjsonEncoder,
+                null=True,
+                verbose_name="Gateway Response",
+            ),
+        ),
+    ]
@@ -6,6 +6,7 @@ Modelos de pagamento para o Backend E-commerce.
 from django.conf import settings
 from django.db import models
 
+from apps.core.encoders import OrjsonDecoder, OrjsonEncoder
 from apps.core.models import BaseModel, TimeStampedModel
 
 
@@ -106,6 +107,9 @@ class Payment(BaseModel):
         "Gateway Response",
         null=True,
         blank=True,
+        encoder=OrjsonEncoder,
+        decoder=OrjsonDecoder,
+        help_text="Whitelisted subset of the gateway response",
     )
 
     # PIX specific
@@ -129,10 +133,28 @@ class Payment(BaseModel):
         verbose_name = "Payment"
         verbose_name_plural = "Payments"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["gateway", "gateway_payment_id"], name="pay_gw_gwid_idx"
+            ),
+            models.Index(
+                fields=["status", "-created_at"], name="pay_status_created_idx"
+            ),
+            models.Index(fields=["order", "status"], name="pay_order_status_idx"),
+        ]
 
     def __str__(self):
         return f"Payment {self.id} for Order {self.order.number}"
 
+    def save(self, *args, **kwargs):
+        # Keep net amount in sync with amount and fee
+        # Mantém o valor líquido sincronizado com valor e taxa
+        self.net_amount = self.amount - (self.fee or 0)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"amount", "fee"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "net_amount"}
+        super().save(*args, **kwargs)
+
 
 class PaymentTransaction(TimeStampedModel):
     """
@@ -170,12 +192,21 @@ class PaymentTransaction(TimeStampedModel):
         "Gateway Response",
         null=True,
         blank=True,
+        encoder=OrjsonEncoder,
+        decoder=OrjsonDecoder,
     )
 
     class Meta:
         verbose_name = "Payment Transaction"
         verbose_name_plural = "Payment Transactions"
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["payment", "gateway_transaction_id"],
+                condition=~models.Q(gateway_transaction_id=""),
+                name="paytx_payment_gwtx_uniq",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} - {self.status}"
@@ -4,12 +4,12 @@ Serializers for the payments app.
 
 from rest_framework import serializers
 
-from .models import Payment, PaymentTransaction
+from .models import Payment
 
 
 class PaymentSerializer(serializers.ModelSerializer):
     """
-    Serializer for payments.
+    Read-only serializer for payments.
     """
 
     order_number = serializers.CharField(source="order.number", read_only=True)
@@ -23,6 +23,7 @@ class PaymentSerializer(serializers.ModelSerializer):
             "method",
             "status",
             "amount",
+            "net_amount",
             "pix_qr_code",
             "pix_qr_code_base64",
             "pix_expiration",
@@ -31,6 +32,7 @@ class PaymentSerializer(serializers.ModelSerializer):
             "boleto_expiration",
             "created_at",
         ]
+        read_only_fields = fields
 
 
 class CreatePaymentSerializer(serializers.Serializer):
@@ -0,0 +1,160 @@
+"""
+Celery tasks for the payments app.
+"""
+
+from collections import defaultdict
+
+from celery import shared_task
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+# Internal payment status -> transaction type recorded for webhooks
+WEBHOOK_TRANSACTION_TYPES = {
+    "approved": "capture",
+    "refunded": "refund",
+}
+
+
+def record_webhook_transactions(payments_results):
+    """
+    Record one PaymentTransaction per (payment, webhook result) pair.
+
+    Rows are written in a single INSERT; redelivered notifications hit the
+    (payment, gateway_transaction_id) constraint and are skipped.
+    """
+    from .models import PaymentTransaction
+
+    PaymentTransaction.objects.bulk_create(
+        [
+            PaymentTransaction(
+                payment=payment,
+                transaction_type=WEBHOOK_TRANSACTION_TYPES.get(
+                    result["status"], "authorization"
+                ),
+                status=result["status"],
+                amount=result.get("amount") or payment.amount,
+                gateway_transaction_id=f"{result['id']}:{result['status']}",
+            )
+            for payment, result in payments_results
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def apply_payment_status_updates(gateway_name: str, results: list) -> int:
+    """
+    Apply a batch of verified webhook payment statuses in one transaction.
+
+    Only payments whose status actually changes are touched, so redelivered
+    or concurrent duplicate notifications are no-ops. Transactions and
+    order status history rows are written with one INSERT each per batch.
+    Returns the number of payments updated.
+    """
+    from apps.orders.models import OrderStatusHistory
+
+    from .models import Payment
+
+    # Last notification wins when a batch holds several for one payment
+    latest = {str(result["id"]): result for result in results}
+
+    by_status = defaultdict(list)
+    for payment_id, result in latest.items():
+        by_status[result["status"]].append(payment_id)
+
+    with transaction.atomic():
+        changed = []
+        for new_status, payment_ids in by_status.items():
+            # Row locks are taken on rows still needing the transition
+            payments = list(
+                Payment.objects.select_for_update()
+                .select_related("order")
+                .defer("gateway_response")
+                .filter(gateway=gateway_name, gateway_payment_id__in=payment_ids)
+                .exclude(status=new_status)
+            )
+            if not payments:
+                continue
+            Payment.objects.filter(pk__in=[p.pk for p in payments]).update(
+                status=new_status, updated_at=timezone.now()
+            )
+            for payment in payments:
+                payment.status = new_status
+                changed.append((payment, latest[payment.gateway_payment_id]))
+
+        if not changed:
+            return 0
+
+        record_webhook_transactions(changed)
+
+        # Update orders of approved payments
+        history = []
+        for payment, result in changed:
+            if result["status"] == "approved":
+                payment.order.status = "paid"
+                payment.order.save(update_fields=["status", "updated_at"])
+                history.append(
+                    OrderStatusHistory(
+                        order=payment.order,
+                        status="paid",
+                        notes="Payment confirmed via webhook",
+                    )
+                )
+        OrderStatusHistory.objects.bulk_create(history, batch_size=500)
+
+    return len(changed)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=10)
+def apply_webhook_payment_updates(self, gateway_name: str, results: list):
+    """
+    Apply several verified webhook payment statuses at once.
+    """
+    try:
+        return apply_payment_status_updates(gateway_name, results)
+    except DatabaseError as exc:
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=10)
+def apply_webhook_payment_update(self, gateway_name: str, result: dict):
+    """
+    Apply a verified webhook payment status to the payment and its order.
+    """
+    try:
+        return apply_payment_status_updates(gateway_name, [result])
+    except DatabaseError as exc:
+        raise self.retry(exc=exc)
+
+
+# Statuses that may still change on the gateway side
+OPEN_PAYMENT_STATUSES = ("pending", "processing")
+
+
+@shared_task
+def reconcile_payments(gateway_name: str, payment_ids: list = None):
+    """
+    Pull current statuses from the gateway and apply the changed ones.
+
+    Without payment_ids, every open payment of the gateway is checked.
+    Statuses are fetched concurrently and applied with one query per
+    status instead of a lookup per payment.
+    """
+    from .gateways import get_gateway
+    from .models import Payment
+
+    if payment_ids is None:
+        payment_ids = list(
+            Payment.objects.filter(
+                gateway=gateway_name, status__in=OPEN_PAYMENT_STATUSES
+            )
+            .exclude(gateway_payment_id="")
+            .values_list("gateway_payment_id", flat=True)
+        )
+    if not payment_ids:
+        return 0
+
+    statuses = get_gateway(gateway_name).get_payment_status_batch(payment_ids)
+    return apply_payment_status_updates(
+        gateway_name,
+        [status for status in statuses.values() if "error" not in status],
+    )
@@ -4,22 +4,67 @@ Views para o app de pagamentos.
 """
 
 import json
+from datetime import timedelta
 
 from django.db import transaction
 from django.http import HttpResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.core.exceptions import BusinessLogicException, PaymentFailedException
-from apps.orders.models import Order, OrderStatusHistory
+from apps.core.decorators import idempotent
+from apps.core.exceptions import (
+    BusinessLogicException,
+    PaymentFailedException,
+    PaymentInProgressException,
+)
+from apps.orders.models import Order
 
-from .gateways.mercadopago import MercadoPagoGateway
-from .gateways.stripe import StripeGateway
+from .gateways import GATEWAYS, get_gateway
 from .models import Payment, PaymentTransaction
 from .serializers import CreatePaymentSerializer, PaymentSerializer, RefundSerializer
+from .tasks import apply_webhook_payment_update
+
+
+# Columns read by PaymentSerializer
+# Colunas lidas pelo PaymentSerializer
+PAYMENT_DETAIL_FIELDS = (
+    "id",
+    "gateway",
+    "method",
+    "status",
+    "amount",
+    "net_amount",
+    "pix_qr_code",
+    "pix_qr_code_base64",
+    "pix_expiration",
+    "boleto_barcode",
+    "boleto_url",
+    "boleto_expiration",
+    "created_at",
+    "order__number",
+)
+
+
+# A claimed attempt older than this is treated as abandoned (worker crash)
+# Uma tentativa reservada mais antiga que isso é considerada abandonada
+PAYMENT_ATTEMPT_TIMEOUT = timedelta(minutes=5)
+
+
+def webhook_update(result):
+    """
+    JSON-safe payment update for apply_webhook_payment_update.
+    Atualização de pagamento serializável em JSON para a task do webhook.
+    """
+    amount = result.get("amount")
+    return {
+        "id": str(result["id"]),
+        "status": result["status"],
+        "amount": str(amount) if amount is not None else None,
+    }
 
 
 class PaymentGatewayMixin:
@@ -29,15 +74,9 @@ class PaymentGatewayMixin:
     """
 
     def get_gateway(self, gateway_name: str):
-        gateways = {
-            "mercadopago": MercadoPagoGateway,
-            "stripe": StripeGateway,
-            # "pagseguro": PagSeguroGateway,
-        }
-        gateway_class = gateways.get(gateway_name)
-        if not gateway_class:
+        if gateway_name not in GATEWAYS:
             raise BusinessLogicException(f"Gateway {gateway_name} not supported.")
-        return gateway_class()
+        return get_gateway(gateway_name)
 
 
 class CreatePaymentView(PaymentGatewayMixin, APIView):
@@ -48,38 +87,33 @@ class CreatePaymentView(PaymentGatewayMixin, APIView):
 
     permission_classes = [permissions.IsAuthenticated]
 
-    @transaction.atomic
+    @idempotent("payments:create")
     def post(self, request):
         serializer = CreatePaymentSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Get order
-        # Obtém pedido
-        try:
-            order = Order.objects.get(
-                id=serializer.validated_data["order_id"],
-                user=request.user,
-            )
-        except Order.DoesNotExist:
-            raise BusinessLogicException("Order not found.")
-
-        if order.status not in ["pending", "awaiting_payment"]:
-            raise BusinessLogicException("Order is not awaiting payment.")
-
         # Get gateway
         # Obtém gateway
         gateway = self.get_gateway(serializer.validated_data["gateway"])
 
-        # Create payment in our system
-        # Cria pagamento no nosso sistema
-        payment = Payment.objects.create(
-            order=order,
-            user=request.user,
-            gateway=serializer.validated_data["gateway"],
-            method=serializer.validated_data["method"],
-            amount=order.total,
-            status="pending",
-        )
+        # Lock and check the order and claim it with a pending payment,
+        # then commit before calling the gateway so no row lock or
+        # connection is held across the network call
+        # Bloqueia e valida o pedido e o reserva com um pagamento pendente,
+        # depois faz commit antes de chamar o gateway, para não manter lock
+        # nem conexão durante a chamada de rede
+        with transaction.atomic():
+            order = self._get_payable_order(
+                request, serializer.validated_data["order_id"]
+            )
+            payment = Payment.objects.create(
+                order=order,
+                user=request.user,
+                gateway=serializer.validated_data["gateway"],
+                method=serializer.validated_data["method"],
+                amount=order.total,
+                status="pending",
+            )
 
         # Process payment with gateway
         # Processa pagamento com gateway
@@ -90,44 +124,118 @@ class CreatePaymentView(PaymentGatewayMixin, APIView):
             "cpf": request.user.cpf,
         }
 
-        result = gateway.create_payment(
-            order_id=order.id,
-            amount=order.total,
-            payment_method=serializer.validated_data["method"],
-            customer_data=customer_data,
-            card_token=serializer.validated_data.get("card_token"),
-            payment_method_id=serializer.validated_data.get("payment_method_id"),
-            installments=serializer.validated_data.get("installments", 1),
-        )
+        try:
+            result = gateway.create_payment(
+                order_id=order.id,
+                amount=order.total,
+                payment_method=serializer.validated_data["method"],
+                customer_data=customer_data,
+                card_token=serializer.validated_data.get("card_token"),
+                payment_method_id=serializer.validated_data.get("payment_method_id"),
+                installments=serializer.validated_data.get("installments", 1),
+                idempotency_key=request.headers.get("Idempotency-Key"),
+            )
+        except Exception:
+            # Release the claim so the customer can try again
+            # Libera a reserva para o cliente poder tentar de novo
+            payment.status = "rejected"
+            payment.save(update_fields=["status", "updated_at"])
+            raise
 
         if not result.success:
             payment.status = "rejected"
+            payment.gateway_payment_id = result.payment_id or ""
             payment.gateway_response = {"error": result.error}
-            payment.save()
+            payment.save(
+                update_fields=[
+                    "status",
+                    "gateway_payment_id",
+                    "gateway_response",
+                    "updated_at",
+                ]
+            )
             raise PaymentFailedException(result.message)
 
-        # Update payment with gateway response
-        # Atualiza pagamento com resposta do gateway
-        payment.gateway_payment_id = result.payment_id
-        payment.status = result.status
-        payment.gateway_status = result.data.get("gateway_status", "")
-        payment.gateway_response = result.data
+        with transaction.atomic():
+            self._record_payment(order, payment, result)
 
-        if result.data:
-            payment.pix_qr_code = result.data.get("pix_qr_code", "")
-            payment.pix_qr_code_base64 = result.data.get("pix_qr_code_base64", "")
-            payment.boleto_url = result.data.get("boleto_url", "")
-            payment.boleto_barcode = result.data.get("boleto_barcode", "")
+        return Response(
+            {
+                "success": True,
+                "message": "Payment processed.",
+                "data": PaymentSerializer(payment).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def _get_payable_order(self, request, order_id):
+        """
+        Lock the user's order and check it is awaiting payment and not
+        already being paid by another request.
+        Bloqueia o pedido do usuário e verifica se aguarda pagamento e se
+        não está sendo pago por outra requisição.
+        """
+        try:
+            order = Order.objects.select_for_update().get(
+                id=order_id,
+                user=request.user,
+            )
+        except Order.DoesNotExist:
+            raise BusinessLogicException("Order not found.")
+
+        if order.status not in ["pending", "awaiting_payment"]:
+            raise BusinessLogicException("Order is not awaiting payment.")
 
-        payment.save()
+        # A pending payment without a gateway id is an attempt still in flight
+        # Um pagamento pendente sem id do gateway é uma tentativa em andamento
+        in_progress = Payment.objects.filter(
+            order=order,
+            status="pending",
+            gateway_payment_id="",
+            created_at__gte=timezone.now() - PAYMENT_ATTEMPT_TIMEOUT,
+        ).exists()
+        if in_progress:
+            raise PaymentInProgressException()
+        return order
+
+    def _record_payment(self, order, payment, result):
+        """
+        Store the gateway result on the claimed payment and move the order forward.
+        Armazena o resultado do gateway no pagamento reservado e avança o pedido.
+        """
+        order = Order.objects.select_for_update().get(pk=order.pk)
+
+        data = result.data or {}
+        payment.status = result.status
+        payment.gateway_payment_id = result.payment_id or ""
+        payment.gateway_status = data.get("gateway_status") or ""
+        payment.gateway_response = result.gateway_response()
+        payment.pix_qr_code = data.get("pix_qr_code") or ""
+        payment.pix_qr_code_base64 = data.get("pix_qr_code_base64") or ""
+        payment.boleto_url = data.get("boleto_url") or ""
+        payment.boleto_barcode = data.get("boleto_barcode") or ""
+        payment.save(
+            update_fields=[
+                "status",
+                "gateway_payment_id",
+                "gateway_status",
+                "gateway_response",
+                "pix_qr_code",
+                "pix_qr_code_base64",
+                "boleto_url",
+                "boleto_barcode",
+                "updated_at",
+            ]
+        )
 
-        # Update order status
-        # Atualiza status do pedido
-        if result.status == "approved":
-            order.status = "paid"
-        else:
-            order.status = "awaiting_payment"
-        order.save()
+        # Update order status, never moving a paid order back
+        # Atualiza status do pedido, sem retroceder um pedido já pago
+        if order.status in ["pending", "awaiting_payment"]:
+            if result.status == "approved":
+                order.status = "paid"
+            else:
+                order.status = "awaiting_payment"
+            order.save(update_fields=["status", "updated_at"])
 
         # Record transaction
         # Registra transação
@@ -137,16 +245,7 @@ class CreatePaymentView(PaymentGatewayMixin, APIView):
             status=result.status,
             amount=order.total,
             gateway_transaction_id=result.payment_id or "",
-            gateway_response=result.data,
-        )
-
-        return Response(
-            {
-                "success": True,
-                "message": "Payment processed.",
-                "data": PaymentSerializer(payment).data,
-            },
-            status=status.HTTP_201_CREATED,
+            gateway_response=result.gateway_response(),
         )
 
 
@@ -160,9 +259,10 @@ class PaymentDetailView(APIView):
 
     def get(self, request, payment_id):
         try:
-            payment = Payment.objects.get(
-                id=payment_id,
-                user=request.user,
+            payment = (
+                Payment.objects.select_related("order")
+                .only(*PAYMENT_DETAIL_FIELDS)
+                .get(id=payment_id, user=request.user)
             )
         except Payment.DoesNotExist:
             return Response(
@@ -189,7 +289,7 @@ class RefundPaymentView(PaymentGatewayMixin, APIView):
         serializer.is_valid(raise_exception=True)
 
         try:
-            payment = Payment.objects.get(
+            payment = Payment.objects.select_related("order").get(
                 id=payment_id,
                 user=request.user,
             )
@@ -213,15 +313,15 @@ class RefundPaymentView(PaymentGatewayMixin, APIView):
         # Atualiza pagamento
         payment.status = "refunded"
         payment.refund_reason = serializer.validated_data.get("reason", "")
-        from django.utils import timezone
-
         payment.refunded_at = timezone.now()
-        payment.save()
+        payment.save(
+            update_fields=["status", "refund_reason", "refunded_at", "updated_at"]
+        )
 
         # Update order
         # Atualiza pedido
         payment.order.status = "refunded"
-        payment.order.save()
+        payment.order.save(update_fields=["status", "updated_at"])
 
         return Response(
             {
@@ -244,32 +344,22 @@ class MercadoPagoWebhookView(PaymentGatewayMixin, APIView):
 
     def post(self, request):
         try:
-            gateway = MercadoPagoGateway()
-            result = gateway.process_webhook(request.data)
+            gateway = self.get_gateway("mercadopago")
+            result = gateway.process_webhook(
+                request.body,
+                request.headers.get("X-Signature"),
+                request_id=request.headers.get("X-Request-Id", ""),
+            )
 
             if "error" in result:
                 return HttpResponse(status=400)
 
+            # Persist the update off the request path
+            # Persiste a atualização fora do ciclo da requisição
             if "id" in result and "status" in result:
-                payment = Payment.objects.filter(
-                    gateway_payment_id=str(result["id"])
-                ).first()
-
-                if payment and payment.status != result["status"]:
-                    payment.status = result["status"]
-                    payment.save()
-
-                    # Update order if payment approved
-                    # Atualiza pedido se pagamento aprovado
-                    if result["status"] == "approved":
-                        payment.order.status = "paid"
-                        payment.order.save()
-
-                        OrderStatusHistory.objects.create(
-                            order=payment.order,
-                            status="paid",
-                            notes="Payment confirmed via webhook",
-                        )
+                apply_webhook_payment_update.delay(
+                    "mercadopago", webhook_update(result)
+                )
 
             return HttpResponse(status=200)
 
@@ -289,7 +379,7 @@ class StripeWebhookView(PaymentGatewayMixin, APIView):
 
     def post(self, request):
         try:
-            gateway = StripeGateway()
+            gateway = self.get_gateway("stripe")
             signature = request.headers.get("Stripe-Signature")
             result = gateway.process_webhook(request.body, signature)
 
@@ -297,17 +387,7 @@ class StripeWebhookView(PaymentGatewayMixin, APIView):
                 return HttpResponse(status=400)
 
             if "id" in result and "status" in result:
-                payment = Payment.objects.filter(
-                    gateway_payment_id=result["id"]
-                ).first()
-
-                if payment and payment.status != result["status"]:
-                    payment.status = result["status"]
-                    payment.save()
-
-                    if result["status"] == "approved":
-                        payment.order.status = "paid"
-                        payment.order.save()
+                apply_webhook_payment_update.delay("stripe", webhook_update(result))
 
             return HttpResponse(status=200)
 
@@ -3,9 +3,21 @@ Admin configuration for the products app.
 """
 
 from django.contrib import admin
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from mptt.admin import DraggableMPTTAdmin
 
-from .models import Brand, Category, Product, ProductImage, ProductReview, ProductVariation, Stock
+from .models import (
+    Brand,
+    Category,
+    Product,
+    ProductExport,
+    ProductImage,
+    ProductReview,
+    ProductVariation,
+    Stock,
+    update_review_stats,
+)
 
 
 @admin.register(Category)
@@ -61,9 +73,12 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ["is_active", "is_featured", "category", "brand"]
     search_fields = ["name", "sku", "description"]
     prepopulated_fields = {"slug": ("name",)}
-    readonly_fields = ["view_count", "order_count"]
+    readonly_fields = ["view_count", "order_count", "avg_rating", "review_count"]
     inlines = [ProductImageInline, ProductVariationInline, StockInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("category", "brand")
+
     fieldsets = (
         (None, {"fields": ("sku", "name", "slug")}),
         ("Description", {"fields": ("short_description", "description")}),
@@ -90,7 +105,7 @@ class ProductAdmin(admin.ModelAdmin):
         (
             "Stats",
             {
-                "fields": ("view_count", "order_count"),
+                "fields": ("view_count", "order_count", "avg_rating", "review_count"),
                 "classes": ("collapse",),
             },
         ),
@@ -111,16 +126,25 @@ class ProductReviewAdmin(admin.ModelAdmin):
     search_fields = ["product__name", "user__email", "title"]
     actions = ["approve_reviews", "reject_reviews"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product", "user")
+
     def approve_reviews(self, request, queryset):
-        queryset.update(is_approved=True)
+        self._set_approved(queryset, True)
 
     approve_reviews.short_description = "Approve selected reviews"
 
     def reject_reviews(self, request, queryset):
-        queryset.update(is_approved=False)
+        self._set_approved(queryset, False)
 
     reject_reviews.short_description = "Reject selected reviews"
 
+    def _set_approved(self, queryset, is_approved):
+        # update() skips the post_save signal, so refresh the stats here
+        product_ids = set(queryset.values_list("product_id", flat=True))
+        queryset.update(is_approved=is_approved)
+        update_review_stats(product_ids)
+
 
 @admin.register(Stock)
 class StockAdmin(admin.ModelAdmin):
@@ -134,3 +158,22 @@ class StockAdmin(admin.ModelAdmin):
     ]
     list_filter = ["product__category"]
     search_fields = ["product__name", "product__sku"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("product", "variation__product")
+            .annotate(
+                available_quantity_db=Greatest(
+                    F("quantity") - F("reserved_quantity"), Value(0)
+                )
+            )
+        )
+
+
+@admin.register(ProductExport)
+class ProductExportAdmin(admin.ModelAdmin):
+    list_display = ["id", "status", "requested_by", "row_count", "created_at"]
+    list_filter = ["status"]
+    readonly_fields = ["completed_at", "row_count", "error"]
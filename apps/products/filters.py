@@ -34,15 +34,10 @@ class ProductFilter(filters.FilterSet):
 
     def filter_on_sale(self, queryset, name, value):
         if value:
-            return queryset.filter(
-                sale_price__isnull=False,
-                sale_price__lt=models.F("base_price"),
-            )
+            return queryset.filter(is_on_sale_db=True)
         return queryset
 
     def filter_in_stock(self, queryset, name, value):
         if value:
-            return queryset.filter(
-                stock_items__quantity__gt=models.F("stock_items__reserved_quantity")
-            ).distinct()
+            return queryset.filter(total_stock__gt=0)
         return queryset
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:15
+
+from django.db import migrations, models
+
+
+def keep_single_primary_image(apps, schema_editor):
+    ProductImage = apps.get_model("products", "ProductImage")
+    seen = set()
+    duplicates = []
+    for image in ProductImage.objects.filter(is_primary=True).order_by(
+        "product_id", "-updated_at", "-id"
+    ):
+        if image.product_id in seen:
+            duplicates.append(image.id)
+        seen.add(image.product_id)
+    ProductImage.objects.filter(id__in=duplicates).update(is_primary=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_single_primary_image, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="productimage",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_primary", True)),
+                fields=("product",),
+                name="uniq_primary_image_per_product",
+            ),
+        ),
+    ]
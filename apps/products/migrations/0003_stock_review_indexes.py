@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_productimage_unique_primary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productreview",
+            index=models.Index(
+                fields=["product", "is_approved"], name="review_product_approved_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                fields=["product", "quantity", "reserved_quantity"],
+                name="stock_product_qty_idx",
+            ),
+        ),
+    ]
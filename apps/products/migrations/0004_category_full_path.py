@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:40
+
+from django.db import migrations, models
+
+
+def fill_full_path(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    # Parents come before their children in (tree_id, lft) order
+    paths = {}
+    categories = list(Category.objects.order_by("tree_id", "lft"))
+    for category in categories:
+        parent_path = paths.get(category.parent_id)
+        category.full_path = (
+            f"{parent_path} > {category.name}" if parent_path else category.name
+        )
+        paths[category.id] = category.full_path
+    Category.objects.bulk_update(categories, ["full_path"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_stock_review_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="full_path",
+            field=models.CharField(
+                blank=True, editable=False, max_length=1024, verbose_name="Full Path"
+            ),
+        ),
+        migrations.RunPython(fill_full_path, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_category_full_path"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "-created_at"],
+                name="products_pr_is_acti_645007_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_product_active_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="current_price_db",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        models.Q(
+                            ("sale_price__isnull", True),
+                            ("sale_price", 0),
+                            _connector="OR",
+                        ),
+                        then=models.F("base_price"),
+                    ),
+                    default=models.F("sale_price"),
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=10),
+                verbose_name="Current Price",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="is_on_sale_db",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        sale_price__lt=models.F("base_price"), then=models.Value(True)
+                    ),
+                    default=models.Value(False),
+                ),
+                output_field=models.BooleanField(),
+                verbose_name="On Sale",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "current_price_db"],
+                name="products_pr_is_acti_eb0212_idx",
+            ),
+        ),
+    ]
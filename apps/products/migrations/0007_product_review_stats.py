@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:47
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_review_stats(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductReview = apps.get_model("products", "ProductReview")
+    approved = ProductReview.objects.filter(
+        product=OuterRef("pk"), is_approved=True
+    ).values("product")
+    Product.objects.update(
+        avg_rating=Coalesce(
+            Subquery(approved.annotate(avg=Avg("rating")).values("avg")),
+            Value(0.0),
+            output_field=models.FloatField(),
+        ),
+        review_count=Coalesce(
+            Subquery(approved.annotate(total=Count("pk")).values("total")),
+            Value(0),
+            output_field=models.IntegerField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_product_generated_prices"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="avg_rating",
+            field=models.FloatField(
+                default=0, editable=False, verbose_name="Average Rating"
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="review_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Review Count"
+            ),
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:50
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_total_stock(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Stock = apps.get_model("products", "Stock")
+    totals = (
+        Stock.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(
+            total=Sum(
+                Greatest(F("quantity") - F("reserved_quantity"), Value(0)),
+                output_field=models.IntegerField(),
+            )
+        )
+        .values("total")
+    )
+    Product.objects.update(
+        total_stock=Coalesce(
+            Subquery(totals, output_field=models.IntegerField()), Value(0)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_product_review_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="total_stock",
+            field=models.PositiveIntegerField(
+                db_index=True, default=0, editable=False, verbose_name="Total Stock"
+            ),
+        ),
+        migrations.RunPython(fill_total_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0009_category_tree_lft_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("is_on_sale_db", True)),
+                fields=["-created_at"],
+                name="product_on_sale_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-16 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0010_product_on_sale_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_is_acti_2fee29_idx",
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("is_featured", True)),
+                fields=["-created_at"],
+                name="product_featured_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-order_count"],
+                name="product_best_sellers_idx",
+            ),
+        ),
+    ]
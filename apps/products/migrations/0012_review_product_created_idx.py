@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-16 00:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0011_product_featured_best_sellers_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productreview",
+            index=models.Index(
+                condition=models.Q(("is_approved", True)),
+                fields=["product", "-created_at"],
+                name="review_product_created_idx",
+            ),
+        ),
+    ]
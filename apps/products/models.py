@@ -3,13 +3,38 @@ Product models for the E-commerce Backend.
 Modelos de produto para o Backend E-commerce.
 """
 
+from datetime import timedelta
 from decimal import Decimal
 
-from django.db import models
-from django.utils.text import slugify
+from django.core.files.storage import storages
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import (
+    Cast,
+    Ceil,
+    Coalesce,
+    Concat,
+    Floor,
+    Greatest,
+    Substr,
+)
+from django.utils import timezone
 from mptt.models import MPTTModel, TreeForeignKey
 
-from apps.core.models import BaseModel, TimeStampedModel
+from apps.core.models import BaseModel, SoftDeleteManager, TimeStampedModel
+from apps.core.utils import assign_unique_slugs
 
 
 class Category(MPTTModel, TimeStampedModel):
@@ -36,6 +61,14 @@ class Category(MPTTModel, TimeStampedModel):
     )
     is_active = models.BooleanField("Active", default=True)
     order = models.PositiveIntegerField("Order", default=0)
+    # Denormalized "Parent > Child" path, kept in sync on save
+    # Caminho "Pai > Filho" desnormalizado, sincronizado no save
+    full_path = models.CharField(
+        "Full Path",
+        max_length=1024,
+        blank=True,
+        editable=False,
+    )
 
     # SEO
     # Otimização para motores de busca (SEO)
@@ -49,23 +82,34 @@ class Category(MPTTModel, TimeStampedModel):
         verbose_name = "Category"
         verbose_name_plural = "Categories"
         ordering = ["order", "name"]
+        indexes = [
+            models.Index(fields=["tree_id", "lft"], name="category_tree_lft_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            assign_unique_slugs([self])
+
+        old_path = self.full_path
+        self.full_path = (
+            f"{self.parent.full_path} > {self.name}" if self.parent else self.name
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.full_path != old_path:
+            kwargs["update_fields"] = {*update_fields, "full_path"}
         super().save(*args, **kwargs)
 
-    @property
-    def full_path(self):
-        """
-        Return the full category path.
-        Retorna o caminho completo da categoria.
-        """
-        ancestors = self.get_ancestors(include_self=True)
-        return " > ".join([a.name for a in ancestors])
+        # Rename or move: rewrite the path prefix of the whole subtree at once
+        # Renomeação ou movimentação: reescreve o prefixo de toda a subárvore
+        if old_path and old_path != self.full_path:
+            self.get_descendants().update(
+                full_path=Concat(
+                    Value(self.full_path), Substr("full_path", len(old_path) + 1)
+                )
+            )
 
 
 class Brand(TimeStampedModel):
@@ -96,10 +140,73 @@ class Brand(TimeStampedModel):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            assign_unique_slugs([self])
         super().save(*args, **kwargs)
 
 
+class ProductQuerySet(models.QuerySet):
+    """
+    Product queryset with aggregate annotations for list views.
+    Queryset de produto com anotações agregadas para listagens.
+    """
+
+    def with_display_fields(self):
+        """
+        Annotate discount_percentage_db.
+        Anota discount_percentage_db.
+
+        current_price_db and is_on_sale_db are generated columns.
+        """
+        discount = (F("base_price") - F("sale_price")) * 100 / F("base_price")
+        # Truncated toward zero, like int() in Product.discount_percentage
+        # Truncado em direção a zero, como int() em Product.discount_percentage
+        return self.annotate(
+            discount_percentage_db=Case(
+                When(
+                    Q(sale_price__isnull=True)
+                    | Q(sale_price=0)
+                    | Q(base_price__lte=0),
+                    then=Value(0),
+                ),
+                When(
+                    sale_price__lte=F("base_price"),
+                    then=Cast(Floor(discount), models.IntegerField()),
+                ),
+                default=Cast(Ceil(discount), models.IntegerField()),
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def with_primary_image(self):
+        """
+        Prefetch each product's primary image into _primary_images.
+        Pré-carrega a imagem principal de cada produto em _primary_images.
+        """
+        return self.prefetch_related(
+            Prefetch(
+                "images",
+                # Only the columns ProductImageSerializer reads
+                # Apenas as colunas lidas pelo ProductImageSerializer
+                queryset=ProductImage.objects.filter(is_primary=True).only(
+                    "id", "product_id", "image", "alt_text", "is_primary", "order"
+                ),
+                to_attr="_primary_images",
+            )
+        )
+
+
+class ProductManager(SoftDeleteManager.from_queryset(ProductQuerySet)):
+    """
+    Default product manager (excludes soft-deleted products).
+    Manager padrão de produtos (exclui produtos excluídos logicamente).
+    """
+
+
+# Generated columns, see Product.current_price_db
+# Colunas geradas, veja Product.current_price_db
+GENERATED_PRICE_FIELDS = ("current_price_db", "is_on_sale_db")
+
+
 class Product(BaseModel):
     """
     Main product model.
@@ -155,6 +262,28 @@ class Product(BaseModel):
         null=True,
         blank=True,
     )
+    # Computed by the database whenever the prices change, for filtering
+    # and sorting in SQL
+    # Calculados pelo banco de dados sempre que os preços mudam, para
+    # filtrar e ordenar em SQL
+    current_price_db = models.GeneratedField(
+        expression=Case(
+            When(Q(sale_price__isnull=True) | Q(sale_price=0), then=F("base_price")),
+            default=F("sale_price"),
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name="Current Price",
+    )
+    is_on_sale_db = models.GeneratedField(
+        expression=Case(
+            When(sale_price__lt=F("base_price"), then=Value(True)),
+            default=Value(False),
+        ),
+        output_field=models.BooleanField(),
+        db_persist=True,
+        verbose_name="On Sale",
+    )
 
     # Status
     # Status
@@ -201,6 +330,20 @@ class Product(BaseModel):
     # Estatísticas
     view_count = models.PositiveIntegerField("View Count", default=0)
     order_count = models.PositiveIntegerField("Order Count", default=0)
+    # Kept in sync with the stock rows by update_stock_totals
+    # Mantido em sincronia com as linhas de estoque por update_stock_totals
+    total_stock = models.PositiveIntegerField(
+        "Total Stock", default=0, editable=False, db_index=True
+    )
+    # Kept in sync with approved reviews by update_review_stats
+    # Mantidos em sincronia com as avaliações aprovadas por update_review_stats
+    avg_rating = models.FloatField("Average Rating", default=0, editable=False)
+    review_count = models.PositiveIntegerField(
+        "Review Count", default=0, editable=False
+    )
+
+    objects = ProductManager()
+    all_objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Product"
@@ -209,8 +352,24 @@ class Product(BaseModel):
         indexes = [
             models.Index(fields=["sku"]),
             models.Index(fields=["slug"]),
-            models.Index(fields=["is_active", "is_featured"]),
             models.Index(fields=["category", "is_active"]),
+            models.Index(fields=["is_active", "-created_at"]),
+            models.Index(fields=["is_active", "current_price_db"]),
+            models.Index(
+                fields=["-created_at"],
+                condition=Q(is_on_sale_db=True, is_active=True),
+                name="product_on_sale_created_idx",
+            ),
+            models.Index(
+                fields=["-created_at"],
+                condition=Q(is_featured=True, is_active=True),
+                name="product_featured_created_idx",
+            ),
+            models.Index(
+                fields=["-order_count"],
+                condition=Q(is_active=True),
+                name="product_best_sellers_idx",
+            ),
         ]
 
     def __str__(self):
@@ -218,8 +377,24 @@ class Product(BaseModel):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            assign_unique_slugs([self])
+        updating = not self._state.adding
         super().save(*args, **kwargs)
+        if updating:
+            # Drop the generated values so they are reloaded when next read
+            # Descarta os valores gerados para recarregá-los na próxima leitura
+            for field in GENERATED_PRICE_FIELDS:
+                self.__dict__.pop(field, None)
+
+    @classmethod
+    def bulk_create_with_slugs(cls, objs, **kwargs):
+        """
+        bulk_create products, filling missing slugs first (save() is skipped).
+        Executa bulk_create de produtos, preenchendo slugs ausentes antes.
+        """
+        objs = list(objs)
+        assign_unique_slugs(objs)
+        return cls.objects.bulk_create(objs, **kwargs)
 
     @property
     def current_price(self):
@@ -227,6 +402,8 @@ class Product(BaseModel):
         Return the current price (sale or base).
         Retorna o preço atual (promocional ou base).
         """
+        # Same rule as current_price_db, from the prices in memory
+        # Mesma regra de current_price_db, a partir dos preços em memória
         return self.sale_price if self.sale_price else self.base_price
 
     @property
@@ -235,6 +412,8 @@ class Product(BaseModel):
         Return the discount percentage.
         Retorna a porcentagem de desconto.
         """
+        if hasattr(self, "discount_percentage_db"):
+            return self.discount_percentage_db
         if self.sale_price and self.base_price > 0:
             discount = ((self.base_price - self.sale_price) / self.base_price) * 100
             return int(discount)
@@ -254,29 +433,17 @@ class Product(BaseModel):
         Get the primary product image.
         Obtém a imagem principal do produto.
         """
+        if hasattr(self, "_primary_images"):
+            return self._primary_images[0] if self._primary_images else None
         return self.images.filter(is_primary=True).first()
 
     @property
     def average_rating(self):
         """
-        Calculate average rating from reviews.
-        Calcula a avaliação média das avaliações.
+        Return the average rating of approved reviews.
+        Retorna a avaliação média das avaliações aprovadas.
         """
-        from django.db.models import Avg
-
-        result = self.reviews.filter(is_approved=True).aggregate(avg=Avg("rating"))
-        return result["avg"] or 0
-
-    @property
-    def total_stock(self):
-        """
-        Calculate total available stock.
-        Calcula o estoque total disponível.
-        """
-        return sum(
-            stock.available_quantity
-            for stock in self.stock_items.all()
-        )
+        return self.avg_rating
 
 
 class ProductVariation(BaseModel):
@@ -364,17 +531,68 @@ class ProductImage(TimeStampedModel):
         verbose_name = "Product Image"
         verbose_name_plural = "Product Images"
         ordering = ["order", "-is_primary"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=Q(is_primary=True),
+                name="uniq_primary_image_per_product",
+            ),
+        ]
 
     def __str__(self):
         return f"Image for {self.product.name}"
 
+    def get_constraints(self):
+        # save() demotes the previous primary image, so model validation
+        # (admin inline forms) must not reject a new one up front
+        # save() desmarca a imagem principal anterior, então a validação do
+        # model (forms do admin) não deve rejeitar uma nova antecipadamente
+        return [
+            (
+                model_class,
+                [
+                    constraint
+                    for constraint in constraints
+                    if constraint.name != "uniq_primary_image_per_product"
+                ],
+            )
+            for model_class, constraints in super().get_constraints()
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._original_is_primary = instance.__dict__.get("is_primary")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._original_is_primary = self.is_primary
+
     def save(self, *args, **kwargs):
-        if self.is_primary:
-            ProductImage.objects.filter(
-                product=self.product,
-                is_primary=True,
-            ).exclude(pk=self.pk).update(is_primary=False)
-        super().save(*args, **kwargs)
+        # Only unset the previous primary image when this one becomes primary
+        # Só desmarca a imagem principal anterior quando esta se torna principal
+        becomes_primary = self.is_primary and (
+            self._state.adding or not getattr(self, "_original_is_primary", False)
+        )
+        if becomes_primary:
+            with transaction.atomic():
+                # Write optimistically; uniq_primary_image_per_product rejects
+                # it only when another primary image exists
+                # Grava de forma otimista; uniq_primary_image_per_product só
+                # rejeita quando já existe outra imagem principal
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                except IntegrityError:
+                    ProductImage.objects.filter(
+                        product_id=self.product_id,
+                        is_primary=True,
+                    ).exclude(pk=self.pk).update(is_primary=False)
+                    super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        self._original_is_primary = self.is_primary
 
 
 class Stock(TimeStampedModel):
@@ -415,6 +633,14 @@ class Stock(TimeStampedModel):
         verbose_name = "Stock"
         verbose_name_plural = "Stock Items"
         unique_together = ["product", "variation"]
+        indexes = [
+            # Covers the in-stock EXISTS subquery and stock totals
+            # Cobre a subquery EXISTS de disponibilidade e os totais de estoque
+            models.Index(
+                fields=["product", "quantity", "reserved_quantity"],
+                name="stock_product_qty_idx",
+            ),
+        ]
 
     def __str__(self):
         if self.variation:
@@ -427,6 +653,8 @@ class Stock(TimeStampedModel):
         Return the available quantity (total - reserved).
         Retorna a quantidade disponível (total - reservado).
         """
+        if hasattr(self, "available_quantity_db"):
+            return self.available_quantity_db
         return max(0, self.quantity - self.reserved_quantity)
 
     @property
@@ -479,6 +707,181 @@ class ProductReview(BaseModel):
         verbose_name_plural = "Product Reviews"
         ordering = ["-created_at"]
         unique_together = ["product", "user"]
+        indexes = [
+            models.Index(
+                fields=["product", "is_approved"], name="review_product_approved_idx"
+            ),
+            models.Index(
+                fields=["product", "-created_at"],
+                condition=Q(is_approved=True),
+                name="review_product_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.email} for {self.product.name}"
+
+
+def export_storage():
+    """
+    Storage for generated export files (STORAGES["exports"]).
+    Storage para arquivos de exportação gerados (STORAGES["exports"]).
+    """
+    return storages["exports"]
+
+
+# Exports still processing after this are treated as crashed
+EXPORT_PROCESSING_TIMEOUT = timedelta(hours=1)
+
+
+class ProductExport(TimeStampedModel):
+    """
+    Product CSV export built in the background for an admin.
+    Exportação de produtos em CSV gerada em segundo plano para um admin.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    requested_by = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="product_exports",
+    )
+    status = models.CharField(
+        "Status", max_length=20, choices=STATUS_CHOICES, default="pending"
+    )
+    search = models.CharField("Search", max_length=200, blank=True)
+    file = models.FileField(
+        "File", upload_to="exports/", storage=export_storage, blank=True
+    )
+    row_count = models.PositiveIntegerField("Row Count", default=0)
+    error = models.TextField("Error", blank=True)
+    completed_at = models.DateTimeField("Completed At", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Product Export"
+        verbose_name_plural = "Product Exports"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Product export #{self.pk} ({self.status})"
+
+    def expire_if_stale(self):
+        """
+        Mark the export failed if it has been processing too long.
+        Marca a exportação como falha se estiver processando há muito tempo.
+
+        A worker killed mid-export never reaches the task's except block.
+        Um worker encerrado no meio da exportação não chega ao except da task.
+        """
+        if self.status != "processing":
+            return
+        now = timezone.now()
+        expired = ProductExport.objects.filter(
+            pk=self.pk,
+            status="processing",
+            updated_at__lt=now - EXPORT_PROCESSING_TIMEOUT,
+        ).update(status="failed", error="Export timed out.", updated_at=now)
+        if expired:
+            self.refresh_from_db()
+
+
+def update_stock_totals(product_ids):
+    """
+    Recompute total_stock of the given products in one UPDATE.
+    Recalcula total_stock dos produtos informados em um único UPDATE.
+
+    Call after writes that bypass Stock signals (update(), bulk_update()).
+    """
+    totals = (
+        Stock.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(
+            total=Sum(
+                Greatest(F("quantity") - F("reserved_quantity"), Value(0)),
+                output_field=models.IntegerField(),
+            )
+        )
+        .values("total")
+    )
+    Product.all_objects.filter(pk__in=product_ids).update(
+        total_stock=Coalesce(
+            Subquery(totals, output_field=models.IntegerField()), Value(0)
+        )
+    )
+
+
+def update_review_stats(product_ids):
+    """
+    Recompute avg_rating and review_count of the given products in one UPDATE.
+    Recalcula avg_rating e review_count dos produtos informados em um único UPDATE.
+
+    Call after writes that bypass ProductReview signals (update()).
+    """
+    approved = ProductReview.objects.filter(
+        product=OuterRef("pk"), is_approved=True
+    ).values("product")
+    Product.all_objects.filter(pk__in=product_ids).update(
+        avg_rating=Coalesce(
+            Subquery(approved.annotate(avg=Avg("rating")).values("avg")),
+            Value(0.0),
+            output_field=models.FloatField(),
+        ),
+        review_count=Coalesce(
+            Subquery(approved.annotate(total=Count("pk")).values("total")),
+            Value(0),
+            output_field=models.IntegerField(),
+        ),
+    )
+
+
+CATEGORY_TREE_CACHE_KEY = "category:tree"
+CATEGORY_ADMIN_TREE_CACHE_KEY = "category:tree:admin"
+
+
+# Signals to invalidate the cached category trees
+# Signals para invalidar as árvores de categorias em cache
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree_cache(sender, instance, **kwargs):
+    """
+    Drop the cached category trees once the write is committed.
+    Remove as árvores de categorias em cache após o commit da escrita.
+    """
+    transaction.on_commit(
+        lambda: cache.delete_many(
+            [CATEGORY_TREE_CACHE_KEY, CATEGORY_ADMIN_TREE_CACHE_KEY]
+        )
+    )
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def refresh_product_review_stats(sender, instance, **kwargs):
+    """
+    Update the denormalized review stats of the reviewed product.
+    Atualiza as estatísticas desnormalizadas de avaliação do produto.
+    """
+    update_review_stats([instance.product_id])
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+def refresh_product_stock_total(sender, instance, **kwargs):
+    """
+    Update the denormalized total_stock of the stock row's product.
+    Atualiza o total_stock desnormalizado do produto da linha de estoque.
+    """
+    update_stock_totals([instance.product_id])
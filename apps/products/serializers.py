@@ -2,9 +2,38 @@
 Serializers for the products app.
 """
 
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
-from .models import Brand, Category, Product, ProductImage, ProductReview, ProductVariation, Stock
+from apps.core.serializers import DynamicFieldsMixin
+
+from .models import (
+    Brand,
+    Category,
+    Product,
+    ProductExport,
+    ProductImage,
+    ProductReview,
+    ProductVariation,
+    Stock,
+    update_stock_totals,
+)
+
+
+def active_children(obj, context):
+    """
+    Return the active children of a category.
+
+    Uses the children_map from the serializer context when the view built
+    one, so rendering a tree does not query once per node.
+    """
+    children_map = context.get("children_map")
+    if children_map is not None:
+        return children_map.get(obj.id, [])
+    return obj.get_children().filter(is_active=True)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -33,8 +62,8 @@ class CategorySerializer(serializers.ModelSerializer):
 
     def get_children(self, obj):
         """Get child categories."""
-        children = obj.get_children().filter(is_active=True)
-        return CategorySerializer(children, many=True).data
+        children = active_children(obj, self.context)
+        return CategorySerializer(children, many=True, context=self.context).data
 
 
 class CategoryTreeSerializer(serializers.ModelSerializer):
@@ -49,8 +78,8 @@ class CategoryTreeSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "slug", "children"]
 
     def get_children(self, obj):
-        children = obj.get_children().filter(is_active=True)
-        return CategoryTreeSerializer(children, many=True).data
+        children = active_children(obj, self.context)
+        return CategoryTreeSerializer(children, many=True, context=self.context).data
 
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -105,6 +134,8 @@ class ProductVariationSerializer(serializers.ModelSerializer):
 
     def get_available_quantity(self, obj):
         """Get available stock for this variation."""
+        if hasattr(obj, "available_quantity_db"):
+            return obj.available_quantity_db
         stock = obj.stock_items.first()
         return stock.available_quantity if stock else 0
 
@@ -132,9 +163,30 @@ class StockSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+# Columns read by ProductListSerializer
+PRODUCT_LIST_FIELDS = (
+    "id",
+    "sku",
+    "name",
+    "slug",
+    "short_description",
+    "category",
+    "category__name",
+    "brand",
+    "brand__name",
+    "base_price",
+    "sale_price",
+    "is_featured",
+    "total_stock",
+    "avg_rating",
+)
+
+
+class ProductListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Simplified product serializer for list views.
+
+    ?fields=id,name,... limits the rendered fields.
     """
 
     category_name = serializers.CharField(source="category.name", read_only=True)
@@ -183,7 +235,6 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     is_on_sale = serializers.ReadOnlyField()
     average_rating = serializers.ReadOnlyField()
     total_stock = serializers.ReadOnlyField()
-    review_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -218,9 +269,6 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "created_at",
         ]
 
-    def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
-
 
 class ProductReviewSerializer(serializers.ModelSerializer):
     """
@@ -269,24 +317,115 @@ class ProductAdminSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ProductExportSerializer(serializers.ModelSerializer):
+    """
+    Admin serializer for product CSV exports.
+    """
+
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductExport
+        fields = [
+            "id",
+            "status",
+            "search",
+            "row_count",
+            "error",
+            "url",
+            "created_at",
+            "completed_at",
+        ]
+
+    def get_url(self, obj):
+        """
+        Download URL: pre-signed when exports are stored on S3, otherwise
+        the admin-only download endpoint.
+        """
+        if obj.status != "completed" or not obj.file:
+            return None
+        if settings.EXPORTS_BUCKET_NAME:
+            return obj.file.url
+        return reverse(
+            "api_v1:admin-product-export-download",
+            kwargs={"export_id": obj.pk},
+            request=self.context.get("request"),
+        )
+
+
+STOCK_ACTIONS = ["set", "add", "subtract"]
+
+
+def apply_stock_action(stock, action, quantity):
+    """Apply a set/add/subtract stock action to a Stock instance in memory."""
+    if action == "set":
+        stock.quantity = quantity
+    elif action == "add":
+        stock.quantity += quantity
+    elif action == "subtract":
+        stock.quantity = max(0, stock.quantity - quantity)
+
+
 class StockUpdateSerializer(serializers.Serializer):
     """
     Serializer for stock updates.
     """
 
     quantity = serializers.IntegerField(min_value=0)
-    action = serializers.ChoiceField(choices=["set", "add", "subtract"])
+    action = serializers.ChoiceField(choices=STOCK_ACTIONS)
 
     def update(self, instance, validated_data):
-        action = validated_data["action"]
-        quantity = validated_data["quantity"]
-
-        if action == "set":
-            instance.quantity = quantity
-        elif action == "add":
-            instance.quantity += quantity
-        elif action == "subtract":
-            instance.quantity = max(0, instance.quantity - quantity)
-
+        apply_stock_action(
+            instance, validated_data["action"], validated_data["quantity"]
+        )
         instance.save()
         return instance
+
+
+class StockBulkUpdateItemSerializer(StockUpdateSerializer):
+    """
+    A single stock row update inside a bulk update.
+    """
+
+    id = serializers.IntegerField()
+
+
+class StockBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for updating many stock rows at once.
+    """
+
+    items = StockBulkUpdateItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        ids = {item["id"] for item in items}
+        found = set(Stock.objects.filter(id__in=ids).values_list("id", flat=True))
+        missing = sorted(ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Stock not found: {missing}")
+        return items
+
+    def save(self):
+        """
+        Apply every item and write all rows with bulk_update.
+
+        Rows are locked while the new quantities are computed, so
+        concurrent add/subtract updates are not lost.
+        """
+        items = self.validated_data["items"]
+        with transaction.atomic():
+            stocks = Stock.objects.select_for_update().in_bulk(
+                {item["id"] for item in items}
+            )
+            for item in items:
+                apply_stock_action(stocks[item["id"]], item["action"], item["quantity"])
+
+            now = timezone.now()
+            for stock in stocks.values():
+                stock.updated_at = now
+            Stock.objects.bulk_update(
+                stocks.values(), ["quantity", "updated_at"], batch_size=1000
+            )
+            # bulk_update sends no signals
+            update_stock_totals({stock.product_id for stock in stocks.values()})
+        return list(stocks.values())
@@ -0,0 +1,105 @@
+"""
+Celery tasks for the products app.
+"""
+
+import csv
+import io
+import logging
+import secrets
+import tempfile
+
+from celery import shared_task
+from django.core.files import File
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_EXPORT_HEADER = [
+    "ID",
+    "SKU",
+    "Name",
+    "Category",
+    "Brand",
+    "Price",
+    "Stock",
+    "Active",
+]
+
+# Plain tuples read from the cursor, no model instances
+PRODUCT_EXPORT_COLUMNS = (
+    "id",
+    "sku",
+    "name",
+    Coalesce("category__name", Value("")),
+    Coalesce("brand__name", Value("")),
+    "base_price",
+    "total_stock",
+    "is_active",
+)
+
+
+@shared_task(ignore_result=True)
+def increment_view_count(product_id: int):
+    """
+    Add one view to a product, atomically in the database.
+    """
+    from .models import Product
+
+    Product.all_objects.filter(pk=product_id).update(view_count=F("view_count") + 1)
+
+
+@shared_task(ignore_result=True)
+def export_products_csv(export_id: int):
+    """
+    Write the products of a ProductExport to a CSV file in export storage.
+
+    Rows are streamed into a temporary file and uploaded once, so memory
+    stays flat however large the catalog is.
+    """
+    from .models import Product, ProductExport
+
+    try:
+        export = ProductExport.objects.get(pk=export_id, status="pending")
+    except ProductExport.DoesNotExist:
+        return
+
+    export.status = "processing"
+    export.save(update_fields=["status", "updated_at"])
+
+    # Same matching as the admin list ?search= (name or SKU, every term);
+    # ?ordering= is not carried over, rows always come newest first
+    products = Product.all_objects.order_by("-created_at")
+    for term in export.search.replace(",", " ").split():
+        products = products.filter(Q(name__icontains=term) | Q(sku__icontains=term))
+    rows = products.values_list(*PRODUCT_EXPORT_COLUMNS).iterator(chunk_size=2000)
+
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(PRODUCT_EXPORT_HEADER)
+            row_count = 0
+            for row in rows:
+                writer.writerow(row)
+                row_count += 1
+            text.flush()
+            text.detach()
+            tmp.seek(0)
+            # Random suffix so the file name cannot be guessed from the id
+            name = f"products-{export.pk}-{secrets.token_hex(8)}.csv"
+            export.file.save(name, File(tmp), save=False)
+    except Exception as e:
+        logger.exception("Product export failed", extra={"export_id": export.pk})
+        export.status = "failed"
+        export.error = str(e)
+        export.save(update_fields=["status", "error", "updated_at"])
+        return
+
+    export.status = "completed"
+    export.row_count = row_count
+    export.completed_at = timezone.now()
+    export.save(
+        update_fields=["status", "file", "row_count", "completed_at", "updated_at"]
+    )
@@ -4,7 +4,7 @@ Padrões de URL para o app de produtos.
 """
 
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from .views import (
     BrandAdminViewSet,
@@ -16,7 +16,9 @@ from .views import (
     StockAdminViewSet,
 )
 
-router = DefaultRouter()
+# SimpleRouter: the API root view of a DefaultRouter would be shadowed by
+# the product list at the empty prefix anyway
+router = SimpleRouter()
 router.register("categories", CategoryViewSet, basename="category")
 router.register("brands", BrandViewSet, basename="brand")
 router.register("", ProductViewSet, basename="product")
@@ -28,7 +30,8 @@ admin_router.register("categories", CategoryAdminViewSet, basename="admin-catego
 admin_router.register("brands", BrandAdminViewSet, basename="admin-brand")
 
 urlpatterns = [
-    path("", include(router.urls)),
+    # Admin routes MUST come before the catch-all router
     path("admin/", include(admin_router.urls)),
+    path("", include(router.urls)),
 ]
 
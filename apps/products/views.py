@@ -3,30 +3,141 @@ Views for the products app.
 Views para o app de produtos.
 """
 
-from django.db.models import Q
+import random
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.http import FileResponse, Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import conditional_page
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from apps.core.pagination import LargeResultsSetPagination
+from apps.core.pagination import (
+    CreatedAtCursorPagination,
+    FixedCreatedAtCursorPagination,
+)
 from apps.core.permissions import IsAdminUser
+from apps.core.serializers import effective_fields
 
 from .filters import ProductFilter
-from .models import Brand, Category, Product, ProductReview, ProductVariation, Stock
+from .models import (
+    CATEGORY_ADMIN_TREE_CACHE_KEY,
+    CATEGORY_TREE_CACHE_KEY,
+    Brand,
+    Category,
+    Product,
+    ProductExport,
+    ProductReview,
+    ProductVariation,
+    Stock,
+)
 from .serializers import (
+    PRODUCT_LIST_FIELDS,
     BrandSerializer,
     CategorySerializer,
     CategoryTreeSerializer,
     ProductAdminSerializer,
     ProductDetailSerializer,
+    ProductExportSerializer,
     ProductListSerializer,
     ProductReviewCreateSerializer,
     ProductReviewSerializer,
     ProductVariationSerializer,
+    StockBulkUpdateSerializer,
     StockSerializer,
     StockUpdateSerializer,
 )
+from .tasks import export_products_csv, increment_view_count
+
+
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 10  # 10 minutes
+RELATED_IDS_CACHE_TIMEOUT = 60  # 1 minute
+RELATED_PRODUCTS_COUNT = 6
+# Browser/CDN max-age for public listings that rarely change
+# max-age de navegador/CDN para listagens públicas que mudam pouco
+PUBLIC_CACHE_MAX_AGE = 60 * 5  # 5 minutes
+
+# Columns read by the product sub-resource actions
+# Colunas lidas pelas ações de sub-recursos do produto
+PRODUCT_KEY_FIELDS = ("id", "slug", "category")
+
+# Columns read by StockSerializer
+# Colunas lidas pelo StockSerializer
+STOCK_LIST_FIELDS = (
+    "id",
+    "quantity",
+    "reserved_quantity",
+    "low_stock_threshold",
+    "location",
+)
+
+# Columns read by ProductReviewSerializer, user name included
+# Colunas lidas pelo ProductReviewSerializer, incluindo o nome do usuário
+REVIEW_LIST_FIELDS = (
+    "id",
+    "rating",
+    "title",
+    "comment",
+    "is_verified_purchase",
+    "created_at",
+    "user__first_name",
+    "user__last_name",
+    "user__email",
+)
+
+
+def category_children_map(categories):
+    """
+    Group categories by parent_id, keeping their order.
+    Agrupa categorias por parent_id, mantendo a ordem.
+
+    Passed to the category serializers as "children_map" so a whole tree
+    renders from one list instead of a query per node.
+    """
+    children_map = defaultdict(list)
+    for category in categories:
+        children_map[category.parent_id].append(category)
+    return children_map
+
+
+def build_category_tree(categories):
+    """
+    Build the category tree as plain dicts in a single pass.
+    Monta a árvore de categorias como dicts simples em uma única passagem.
+
+    categories must be in tree_id/lft order, so every parent comes before
+    its children. Nodes whose parent is not in the list are left out.
+    Renders the same shape as CategoryTreeSerializer without one
+    serializer instance per node.
+    """
+    nodes = {}
+    roots = []
+    for category in categories.values("id", "name", "slug", "parent_id", "order"):
+        parent_id = category["parent_id"]
+        if parent_id is not None and parent_id not in nodes:
+            continue
+        node = {
+            "id": category["id"],
+            "name": category["name"],
+            "slug": category["slug"],
+            "children": [],
+        }
+        nodes[category["id"]] = node
+        if parent_id is None:
+            roots.append((category["order"], category["name"], node))
+        else:
+            nodes[parent_id]["children"].append(node)
+
+    roots.sort(key=lambda root: root[:2])
+    return [node for _, _, node in roots]
 
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -45,38 +156,70 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
             return CategoryTreeSerializer
         return CategorySerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "list":
+            # One query for every active category in tree order
+            # Uma consulta para todas as categorias ativas em ordem de árvore
+            categories = list(
+                Category.objects.filter(is_active=True).order_by("tree_id", "lft")
+            )
+            context["children_map"] = category_children_map(categories)
+        return context
+
     @action(detail=False, methods=["get"])
+    @method_decorator(gzip_page)
+    @method_decorator(conditional_page)
+    @method_decorator(cache_control(public=True, max_age=PUBLIC_CACHE_MAX_AGE))
     def tree(self, request):
         """
         Get category tree starting from root.
         Obtém a árvore de categorias a partir da raiz.
         """
-        root_categories = Category.objects.filter(
-            parent=None,
-            is_active=True,
-        ).order_by("order", "name")
-        serializer = self.get_serializer(root_categories, many=True)
-        return Response({"success": True, "data": serializer.data})
+        data = cache.get(CATEGORY_TREE_CACHE_KEY)
+        if data is None:
+            data = build_category_tree(
+                Category.objects.filter(is_active=True).order_by("tree_id", "lft")
+            )
+            cache.set(CATEGORY_TREE_CACHE_KEY, data, CATEGORY_TREE_CACHE_TIMEOUT)
+        return Response({"success": True, "data": data})
 
-    @action(detail=True, methods=["get"])
+    # Keyset pages skip the COUNT(*) over the whole subtree; ?ordering= names
+    # Category fields, so the product order stays pinned
+    # Páginas por cursor evitam o COUNT(*) sobre toda a subárvore; ?ordering=
+    # refere-se a campos de Category, então a ordem dos produtos é fixa
+    @action(
+        detail=True,
+        methods=["get"],
+        pagination_class=FixedCreatedAtCursorPagination,
+    )
     def products(self, request, slug=None):
         """
         Get products in a category and its descendants.
         Obtém produtos em uma categoria e seus descendentes.
         """
         category = self.get_object()
-        descendants = category.get_descendants(include_self=True)
-        products = Product.objects.filter(
-            category__in=descendants,
-            is_active=True,
-        ).order_by("-created_at")
+        # The subtree is a lft range of the tree, matched on the joined row
+        # A subárvore é um intervalo de lft da árvore, filtrado no join
+        products = (
+            Product.objects.filter(
+                category__tree_id=category.tree_id,
+                category__lft__range=(category.lft, category.rght),
+                is_active=True,
+            )
+            .select_related("category", "brand")
+            .with_primary_image()
+            .with_display_fields()
+            .only(*PRODUCT_LIST_FIELDS)
+        )
 
+        context = {"request": request}
         page = self.paginate_queryset(products)
         if page is not None:
-            serializer = ProductListSerializer(page, many=True)
+            serializer = ProductListSerializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = ProductListSerializer(products, many=True)
+        serializer = ProductListSerializer(products, many=True, context=context)
         return Response({"success": True, "data": serializer.data})
 
 
@@ -98,9 +241,13 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     ViewSet para produtos.
     """
 
-    queryset = Product.objects.filter(is_active=True)
+    queryset = (
+        Product.objects.filter(is_active=True)
+        .select_related("category", "brand")
+        .with_display_fields()
+    )
     permission_classes = [permissions.AllowAny]
-    pagination_class = LargeResultsSetPagination
+    pagination_class = CreatedAtCursorPagination
     lookup_field = "slug"
     filter_backends = [
         DjangoFilterBackend,
@@ -109,9 +256,50 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     ]
     filterset_class = ProductFilter
     search_fields = ["name", "description", "sku"]
-    ordering_fields = ["name", "base_price", "created_at", "order_count"]
+    ordering_fields = [
+        "name",
+        "base_price",
+        "current_price_db",
+        "created_at",
+        "order_count",
+    ]
     ordering = ["-created_at"]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "featured", "on_sale", "best_sellers"):
+            queryset = queryset.only(*PRODUCT_LIST_FIELDS)
+            # Skip the image query when ?fields= leaves primary_image out
+            # Pula a consulta de imagens quando ?fields= omite primary_image
+            fields = effective_fields(
+                self.request, self.get_serializer_class().Meta.fields
+            )
+            if fields is None or "primary_image" in fields:
+                queryset = queryset.with_primary_image()
+        elif self.action == "retrieve":
+            # Available stock of each variation comes with the variations query
+            # O estoque disponível de cada variação vem na consulta das variações
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "variations",
+                    queryset=ProductVariation.objects.annotate(
+                        available_quantity_db=Coalesce(
+                            Greatest(
+                                F("stock_items__quantity")
+                                - F("stock_items__reserved_quantity"),
+                                Value(0),
+                            ),
+                            Value(0),
+                        )
+                    ),
+                )
+            )
+        elif self.action in ("related", "reviews", "add_review"):
+            # These actions only need the product's keys
+            # Estas ações só precisam das chaves do produto
+            queryset = Product.objects.filter(is_active=True).only(*PRODUCT_KEY_FIELDS)
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return ProductDetailSerializer
@@ -124,23 +312,24 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         """
         instance = self.get_object()
 
-        # Increment view count
-        # Incrementa contagem de visualizações
-        Product.objects.filter(pk=instance.pk).update(
-            view_count=instance.view_count + 1
-        )
+        # Increment view count off the request path
+        # Incrementa contagem de visualizações fora do ciclo da requisição
+        transaction.on_commit(lambda: increment_view_count.delay(instance.pk))
 
         serializer = self.get_serializer(instance)
         return Response({"success": True, "data": serializer.data})
 
     @action(detail=False, methods=["get"])
+    @method_decorator(gzip_page)
+    @method_decorator(conditional_page)
+    @method_decorator(cache_control(public=True, max_age=PUBLIC_CACHE_MAX_AGE))
     def featured(self, request):
         """
         Get featured products.
         Obtém produtos em destaque.
         """
         products = self.get_queryset().filter(is_featured=True)[:12]
-        serializer = ProductListSerializer(products, many=True)
+        serializer = self.get_serializer(products, many=True)
         return Response({"success": True, "data": serializer.data})
 
     @action(detail=False, methods=["get"])
@@ -149,16 +338,13 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         Get products on sale.
         Obtém produtos em promoção.
         """
-        products = self.get_queryset().filter(
-            sale_price__isnull=False,
-            sale_price__lt=models.F("base_price"),
-        )
+        products = self.get_queryset().filter(is_on_sale_db=True)
         page = self.paginate_queryset(products)
         if page is not None:
-            serializer = ProductListSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = ProductListSerializer(products, many=True)
+        serializer = self.get_serializer(products, many=True)
         return Response({"success": True, "data": serializer.data})
 
     @action(detail=False, methods=["get"])
@@ -168,17 +354,27 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         Obtém produtos mais vendidos.
         """
         products = self.get_queryset().order_by("-order_count")[:12]
-        serializer = ProductListSerializer(products, many=True)
+        serializer = self.get_serializer(products, many=True)
         return Response({"success": True, "data": serializer.data})
 
-    @action(detail=True, methods=["get"])
+    # Reviews keep newest-first; ?ordering= names Product fields
+    # Avaliações ficam das mais novas; ?ordering= refere-se a campos de Product
+    @action(
+        detail=True,
+        methods=["get"],
+        pagination_class=FixedCreatedAtCursorPagination,
+    )
     def reviews(self, request, slug=None):
         """
         Get product reviews.
         Obtém avaliações de produtos.
         """
         product = self.get_object()
-        reviews = product.reviews.filter(is_approved=True).order_by("-created_at")
+        reviews = (
+            ProductReview.objects.filter(product=product, is_approved=True)
+            .select_related("user")
+            .only(*REVIEW_LIST_FIELDS)
+        )
 
         page = self.paginate_queryset(reviews)
         if page is not None:
@@ -200,9 +396,18 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         """
         product = self.get_object()
 
-        # Check if user already reviewed
-        # Verifica se o usuário já avaliou
-        if product.reviews.filter(user=request.user).exists():
+        serializer = ProductReviewCreateSerializer(
+            data=request.data,
+            context={"request": request, "product": product},
+        )
+        serializer.is_valid(raise_exception=True)
+
+        # The (product, user) unique constraint rejects a second review
+        # A restrição única (produto, usuário) rejeita uma segunda avaliação
+        try:
+            with transaction.atomic():
+                review = serializer.save()
+        except IntegrityError:
             return Response(
                 {
                     "success": False,
@@ -211,13 +416,6 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        serializer = ProductReviewCreateSerializer(
-            data=request.data,
-            context={"request": request, "product": product},
-        )
-        serializer.is_valid(raise_exception=True)
-        review = serializer.save()
-
         return Response(
             {
                 "success": True,
@@ -234,15 +432,32 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         Obtém produtos relacionados.
         """
         product = self.get_object()
-        related = (
-            Product.objects.filter(
-                category=product.category,
-                is_active=True,
+
+        # Sample ids in Python instead of sorting the category by random()
+        # Sorteia ids em Python em vez de ordenar a categoria por random()
+        cache_key = f"category:{product.category_id}:product_ids"
+        ids = cache.get(cache_key)
+        if ids is None:
+            ids = list(
+                Product.objects.filter(
+                    category_id=product.category_id,
+                    is_active=True,
+                ).values_list("pk", flat=True)
             )
-            .exclude(pk=product.pk)
-            .order_by("?")[:6]
+            cache.set(cache_key, ids, RELATED_IDS_CACHE_TIMEOUT)
+        candidates = [pk for pk in ids if pk != product.pk]
+        sampled = random.sample(
+            candidates, min(RELATED_PRODUCTS_COUNT, len(candidates))
         )
-        serializer = ProductListSerializer(related, many=True)
+
+        related = (
+            Product.objects.filter(pk__in=sampled, is_active=True)
+            .select_related("category", "brand")
+            .with_primary_image()
+            .with_display_fields()
+            .only(*PRODUCT_LIST_FIELDS)
+        )
+        serializer = self.get_serializer(related, many=True)
         return Response({"success": True, "data": serializer.data})
 
 
@@ -264,39 +479,79 @@ class ProductAdminViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "sku"]
     ordering = ["-created_at"]
 
-    @action(detail=False, methods=["get"])
+    @action(detail=False, methods=["post"])
     def export_csv(self, request):
         """
-        Export products to CSV.
-        Exporta produtos para CSV.
-        """
-        import csv
-        from django.http import HttpResponse
+        Queue a products CSV export and return its job.
+        Enfileira uma exportação de produtos em CSV e retorna o job.
 
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="products.csv"'
+        The file is written by a Celery task; poll exports/<id>/ for its URL.
+        O arquivo é gerado por uma task do Celery; consulte exports/<id>/ para a URL.
 
-        writer = csv.writer(response)
-        writer.writerow(
-            ["ID", "SKU", "Name", "Category", "Brand", "Price", "Stock", "Active"]
+        Only ?search= is applied; rows are always newest first, ?ordering= is ignored.
+        Apenas ?search= é aplicado; as linhas vêm sempre das mais novas, sem ?ordering=.
+        """
+        search = request.data.get("search") or request.query_params.get("search", "")
+        export = ProductExport.objects.create(
+            requested_by=request.user, search=search[:200]
+        )
+        transaction.on_commit(lambda: export_products_csv.delay(export.id))
+        return Response(
+            {
+                "success": True,
+                "message": "Export queued.",
+                "data": ProductExportSerializer(
+                    export, context={"request": request}
+                ).data,
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
 
-        products = self.filter_queryset(self.get_queryset())
-        for product in products:
-            writer.writerow(
-                [
-                    product.id,
-                    product.sku,
-                    product.name,
-                    product.category.name if product.category else "",
-                    product.brand.name if product.brand else "",
-                    product.base_price,
-                    product.total_stock,
-                    product.is_active,
-                ]
-            )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"exports/(?P<export_id>[0-9]+)",
+    )
+    def export_status(self, request, export_id=None):
+        """
+        Get a products CSV export and, once completed, its download URL.
+        Obtém uma exportação de produtos em CSV e, quando concluída, sua URL.
+        """
+        export = generics.get_object_or_404(ProductExport, pk=export_id)
+        export.expire_if_stale()
+        return Response(
+            {
+                "success": True,
+                "data": ProductExportSerializer(
+                    export, context={"request": request}
+                ).data,
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"exports/(?P<export_id>[0-9]+)/download",
+    )
+    def export_download(self, request, export_id=None):
+        """
+        Download a completed products CSV export.
+        Baixa uma exportação de produtos em CSV concluída.
 
-        return response
+        Local exports live outside MEDIA_ROOT, so this is the only way to them.
+        Exportações locais ficam fora do MEDIA_ROOT, então só são servidas aqui.
+        """
+        export = generics.get_object_or_404(
+            ProductExport, pk=export_id, status="completed"
+        )
+        if not export.file:
+            raise Http404
+        return FileResponse(
+            export.file.open("rb"),
+            as_attachment=True,
+            filename=f"products-{export.pk}.csv",
+            content_type="text/csv",
+        )
 
 
 class StockAdminViewSet(viewsets.ModelViewSet):
@@ -309,6 +564,14 @@ class StockAdminViewSet(viewsets.ModelViewSet):
     serializer_class = StockSerializer
     permission_classes = [IsAdminUser]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "low_stock"):
+            # StockSerializer reads no related rows, so no joins are needed
+            # StockSerializer não lê linhas relacionadas, então não há joins
+            queryset = queryset.only(*STOCK_LIST_FIELDS)
+        return queryset
+
     @action(detail=True, methods=["patch"])
     def update_quantity(self, request, pk=None):
         """
@@ -332,15 +595,31 @@ class StockAdminViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=False, methods=["post"])
+    def bulk_update_quantity(self, request):
+        """
+        Update the quantity of many stock rows in one request.
+        Atualiza a quantidade de várias linhas de estoque em uma requisição.
+        """
+        serializer = StockBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        stocks = serializer.save()
+
+        return Response(
+            {
+                "success": True,
+                "message": f"{len(stocks)} stock items updated successfully.",
+                "data": StockSerializer(stocks, many=True).data,
+            }
+        )
+
     @action(detail=False, methods=["get"])
     def low_stock(self, request):
         """
         Get products with low stock.
         Obtém produtos com estoque baixo.
         """
-        low_stock = Stock.objects.filter(
-            quantity__lte=models.F("low_stock_threshold")
-        ).select_related("product", "variation")
+        low_stock = self.get_queryset().filter(quantity__lte=F("low_stock_threshold"))
 
         serializer = self.get_serializer(low_stock, many=True)
         return Response({"success": True, "data": serializer.data})
@@ -359,15 +638,32 @@ class CategoryAdminViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "slug"]
     ordering = ["order", "name"]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "list":
+            # Children of every listed category from one query
+            # Filhos de todas as categorias listadas em uma consulta
+            active = Category.objects.filter(is_active=True).order_by("tree_id", "lft")
+            context["children_map"] = category_children_map(active)
+        return context
+
     @action(detail=False, methods=["get"])
     def tree(self, request):
         """
         Get category tree for admin.
         Obtém árvore de categorias para admin.
         """
-        root_categories = Category.objects.filter(parent=None)
-        serializer = CategoryTreeSerializer(root_categories, many=True)
-        return Response({"success": True, "data": serializer.data})
+        data = cache.get(CATEGORY_ADMIN_TREE_CACHE_KEY)
+        if data is None:
+            # Every root, plus the active categories below them
+            # Todas as raízes, mais as categorias ativas abaixo delas
+            data = build_category_tree(
+                Category.objects.filter(Q(parent=None) | Q(is_active=True)).order_by(
+                    "tree_id", "lft"
+                )
+            )
+            cache.set(CATEGORY_ADMIN_TREE_CACHE_KEY, data, CATEGORY_TREE_CACHE_TIMEOUT)
+        return Response({"success": True, "data": data})
 
     @action(detail=True, methods=["post"])
     def toggle_active(self, request, pk=None):
@@ -3,11 +3,22 @@ Store settings models for the E-commerce Backend.
 Modelos de configurações da loja para o Backend E-commerce.
 """
 
-from django.db import models
+import copy
+import time
+
+from django.core.cache import cache
+from django.db import models, transaction
 
 from apps.core.models import TimeStampedModel
 
 
+PUBLIC_SETTINGS_CACHE_KEY = "store_settings:public"
+
+# Seconds a process reuses its in-memory settings row
+# Segundos que um processo reutiliza a linha de configurações em memória
+SETTINGS_MEMO_TIMEOUT = 30
+
+
 class StoreSettings(TimeStampedModel):
     """
     Singleton model for store settings.
@@ -84,6 +95,10 @@ class StoreSettings(TimeStampedModel):
     email_from_name = models.CharField("Email From Name", max_length=100, blank=True)
     email_from_address = models.EmailField("Email From Address", blank=True)
 
+    # Process-local memo used by get_settings()
+    # Memo local do processo usado por get_settings()
+    _settings_memo = {"obj": None, "at": 0}
+
     class Meta:
         verbose_name = "Store Settings"
         verbose_name_plural = "Store Settings"
@@ -98,6 +113,9 @@ class StoreSettings(TimeStampedModel):
         """
         self.pk = 1
         super().save(*args, **kwargs)
+        # Drop the cached settings once the write is committed
+        # Remove as configurações em cache após o commit da escrita
+        transaction.on_commit(self.clear_cache)
 
     def delete(self, *args, **kwargs):
         """
@@ -111,6 +129,24 @@ class StoreSettings(TimeStampedModel):
         """
         Get or create the settings instance.
         Obtém ou cria a instância de configurações.
+
+        The row is memoized per process for SETTINGS_MEMO_TIMEOUT seconds;
+        callers get a copy, so changing it does not touch the shared one.
+        A linha é memorizada por processo por SETTINGS_MEMO_TIMEOUT segundos;
+        quem chama recebe uma cópia, então alterá-la não afeta a compartilhada.
+        """
+        memo = cls._settings_memo
+        now = time.monotonic()
+        if memo["obj"] is None or now - memo["at"] >= SETTINGS_MEMO_TIMEOUT:
+            settings, _ = cls.objects.get_or_create(pk=1)
+            memo.update(obj=settings, at=now)
+        return copy.copy(memo["obj"])
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Forget the memoized row and the cached public settings.
+        Descarta a linha memorizada e as configurações públicas em cache.
         """
-        settings, _ = cls.objects.get_or_create(pk=1)
-        return settings
+        cls._settings_memo.update(obj=None, at=0)
+        cache.delete(PUBLIC_SETTINGS_CACHE_KEY)
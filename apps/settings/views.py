@@ -3,15 +3,23 @@ Views for the settings app.
 Views para o app de configurações.
 """
 
+from django.core.cache import cache
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import conditional_page
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.core.permissions import IsAdminUser
 
-from .models import StoreSettings
+from .models import PUBLIC_SETTINGS_CACHE_KEY, StoreSettings
 from .serializers import StoreSettingsPublicSerializer, StoreSettingsSerializer
 
+PUBLIC_SETTINGS_CACHE_TIMEOUT = 60 * 60  # 1 hour
+PUBLIC_SETTINGS_MAX_AGE = 60 * 5  # 5 minutes, for browsers and CDNs
+
 
 class StoreSettingsDetailView(APIView):
     """
@@ -48,7 +56,12 @@ class PublicStoreSettingsView(APIView):
 
     permission_classes = [permissions.AllowAny]
 
+    @method_decorator(gzip_page)
+    @method_decorator(conditional_page)
+    @method_decorator(cache_control(public=True, max_age=PUBLIC_SETTINGS_MAX_AGE))
     def get(self, request):
-        settings = StoreSettings.get_settings()
-        serializer = StoreSettingsPublicSerializer(settings)
-        return Response({"success": True, "data": serializer.data})
+        data = cache.get(PUBLIC_SETTINGS_CACHE_KEY)
+        if data is None:
+            data = StoreSettingsPublicSerializer(StoreSettings.get_settings()).data
+            cache.set(PUBLIC_SETTINGS_CACHE_KEY, data, PUBLIC_SETTINGS_CACHE_TIMEOUT)
+        return Response({"success": True, "data": data})
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-15 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipping", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shippingrate",
+            index=models.Index(
+                fields=["method", "zipcode_start", "zipcode_end"],
+                name="shipping_rate_zip_range_idx",
+            ),
+        ),
+    ]
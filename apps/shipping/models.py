@@ -81,6 +81,12 @@ class ShippingRate(TimeStampedModel):
     class Meta:
         verbose_name = "Shipping Rate"
         verbose_name_plural = "Shipping Rates"
+        indexes = [
+            models.Index(
+                fields=["method", "zipcode_start", "zipcode_end"],
+                name="shipping_rate_zip_range_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.method.name}: {self.zipcode_start}-{self.zipcode_end}"
@@ -57,6 +57,8 @@ class ShippingMethodSerializer(serializers.ModelSerializer):
 
     def get_rates_count(self, obj):
         """Get number of rates for this method."""
+        if hasattr(obj, "rates_count_db"):
+            return obj.rates_count_db
         return obj.rates.count()
 
 
@@ -3,15 +3,74 @@ Correios API integration service.
 """
 
 import logging
-from dataclasses import dataclass
-from decimal import Decimal
-from typing import List, Optional
+import re
+from dataclasses import asdict, dataclass
+from decimal import ROUND_CEILING, Decimal
+from itertools import chain
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Optional
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from lxml import etree
+
+from apps.core.utils import build_http_session
 
 logger = logging.getLogger(__name__)
 
+# C parser for Correios replies, shared across calls. Entities, DTDs and
+# network access are disabled (XXE); malformed replies fail instead of
+# being recovered
+_XML_PARSER = etree.XMLParser(
+    resolve_entities=False,
+    no_network=True,
+    load_dtd=False,
+    huge_tree=False,
+    recover=False,
+)
+
+# Tracking event inside a page text node: "dd/mm/yyyy hh:mm - description"
+_TRACKING_EVENT_RE = re.compile(r"(\d{2}/\d{2}/\d{4})\s+(\d{2}:\d{2})\s*-?\s*(.+)")
+MAX_TRACKING_EVENTS = 10  # Limit to last 10 events
+TRACKING_CHUNK_SIZE = 8192
+
+# Separators stripped from a CEP before validating it
+_CEP_STRIP = str.maketrans("", "", "-. ")
+
+QUOTE_CACHE_TIMEOUT = 60 * 60  # 1 hour
+FALLBACK_QUOTE_CACHE_TIMEOUT = 60  # Correios failing: retry after a minute
+
+# Keep-alive session shared by every Correios call in this process
+_SESSION = build_http_session(
+    retries=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)
+)
+
+
+def _iter_html_texts(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Yield the text nodes of an HTML document as its chunks are parsed."""
+    parser = etree.HTMLPullParser(events=("end",))
+    previous = None
+    for chunk in chain(chunks, [None]):
+        if chunk is None:
+            parser.close()
+        else:
+            parser.feed(chunk)
+        for _, element in parser.read_events():
+            # An element's tail is complete once the next element ends
+            if previous is not None and previous.tail:
+                yield previous.tail
+            if element.text:
+                yield element.text
+            previous = element
+    if previous is not None and previous.tail:
+        yield previous.tail
+
+
+def get_session() -> requests.Session:
+    """Return the shared HTTP session used for Correios calls."""
+    return _SESSION
+
 
 @dataclass
 class ShippingOption:
@@ -35,13 +94,25 @@ class CorreiosService:
     """
 
     # Correios service codes
-    SERVICES = {
+    SERVICES = MappingProxyType({
         "sedex": "04014",      # SEDEX à vista
         "pac": "04510",        # PAC à vista
         "sedex10": "40215",    # SEDEX 10
         "sedex12": "40169",    # SEDEX 12
         "sedex_hoje": "40290", # SEDEX Hoje
-    }
+    })
+
+    # nCdServico for the default quote: SEDEX and PAC
+    DEFAULT_SERVICE_CODES = ",".join(map(SERVICES.__getitem__, ("sedex", "pac")))
+
+    # Human-readable names by service code
+    SERVICE_NAMES = MappingProxyType({
+        "04014": "SEDEX",
+        "04510": "PAC",
+        "40215": "SEDEX 10",
+        "40169": "SEDEX 12",
+        "40290": "SEDEX Hoje",
+    })
 
     # Correios API URLs
     CALC_PRICE_URL = "http://ws.correios.com.br/calculador/CalcPrecoPrazo.asmx/CalcPrecoPrazo"
@@ -78,16 +149,33 @@ class CorreiosService:
             services: List of service codes to calculate (default: sedex, pac)
 
         Returns:
-            List of ShippingOption with prices and deadlines
+            List of ShippingOption with prices and deadlines (empty for an
+            invalid CEP)
         """
-        destination_cep = destination_cep.replace("-", "").replace(".", "")
+        destination_cep = destination_cep.translate(_CEP_STRIP)
+        # A malformed CEP can never be quoted; skip the API round-trip
+        if len(destination_cep) != 8 or not destination_cep.isdigit():
+            return []
         
         if services is None:
-            services = ["sedex", "pac"]
-
-        service_codes = ",".join(
-            self.SERVICES.get(s, s) for s in services if s in self.SERVICES
+            service_codes = self.DEFAULT_SERVICE_CODES
+        else:
+            service_codes = ",".join(
+                self.SERVICES[s] for s in services if s in self.SERVICES
+            )
+
+        # Round up to 100 g and 5 cm steps so near-identical packages share
+        # a cached quote; rounding up never under-quotes the package
+        weight = (Decimal(weight) * 10).to_integral_value(ROUND_CEILING) / 10
+        length, height, width = (-(-int(d) // 5) * 5 for d in (length, height, width))
+
+        cache_key = (
+            f"correios:quote:{self.company_code}:{self.origin_cep}:"
+            f"{destination_cep}:{weight}:{length}x{height}x{width}:{service_codes}"
         )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return [ShippingOption(**option) for option in cached]
 
         params = {
             "nCdEmpresa": self.company_code,
@@ -107,22 +195,34 @@ class CorreiosService:
         }
 
         try:
-            response = requests.get(self.CALC_PRICE_URL, params=params, timeout=10)
+            response = get_session().get(
+                self.CALC_PRICE_URL, params=params, timeout=10
+            )
             response.raise_for_status()
-            return self._parse_response(response.text)
+            options = self._parse_response(response.content)
         except requests.RequestException as e:
             logger.exception("Correios API error")
             # Return fallback options if API fails
-            return self._get_fallback_options()
-
-    def _parse_response(self, xml_response: str) -> List[ShippingOption]:
-        """Parse Correios XML response."""
-        import xml.etree.ElementTree as ET
+            options = self._get_fallback_options()
+            timeout = FALLBACK_QUOTE_CACHE_TIMEOUT
+        except etree.XMLSyntaxError:
+            options = self._get_fallback_options()
+            timeout = FALLBACK_QUOTE_CACHE_TIMEOUT
+        else:
+            # Keep only a full, error-free quote for long; per-service
+            # errors are retried soon
+            complete = bool(options) and all(o.error is None for o in options)
+            timeout = QUOTE_CACHE_TIMEOUT if complete else FALLBACK_QUOTE_CACHE_TIMEOUT
+
+        cache.set(cache_key, [asdict(option) for option in options], timeout)
+        return options
 
+    def _parse_response(self, xml_response: bytes) -> List[ShippingOption]:
+        """Parse Correios XML response; a malformed reply raises XMLSyntaxError."""
         options = []
         
         try:
-            root = ET.fromstring(xml_response)
+            root = etree.fromstring(xml_response, parser=_XML_PARSER)
             
             # Find all service results
             for service in root.findall(".//cServico"):
@@ -161,22 +261,15 @@ class CorreiosService:
                     max_days=deadline + 2,  # Buffer for delays
                 ))
 
-        except ET.ParseError as e:
+        except etree.XMLSyntaxError:
             logger.exception("Failed to parse Correios response")
-            return self._get_fallback_options()
+            raise
 
         return options
 
     def _get_service_name(self, code: str) -> str:
         """Get human-readable service name from code."""
-        names = {
-            "04014": "SEDEX",
-            "04510": "PAC",
-            "40215": "SEDEX 10",
-            "40169": "SEDEX 12",
-            "40290": "SEDEX Hoje",
-        }
-        return names.get(code, f"Correios ({code})")
+        return self.SERVICE_NAMES.get(code, f"Correios ({code})")
 
     def _get_fallback_options(self) -> List[ShippingOption]:
         """Return fallback options when API is unavailable."""
@@ -212,10 +305,16 @@ class CorreiosService:
         try:
             # Using public tracking API
             url = f"{self.TRACKING_URL}{tracking_code}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                return self._parse_tracking_response(response.text, tracking_code)
+            # Parse while downloading; leaving the block after the last
+            # event kept closes the connection without reading the rest
+            with get_session().get(url, timeout=10, stream=True) as response:
+                if response.status_code == 200:
+                    return {
+                        "code": tracking_code,
+                        "events": self._parse_tracking_events(
+                            response.iter_content(TRACKING_CHUNK_SIZE)
+                        ),
+                    }
             
             return {
                 "code": tracking_code,
@@ -231,27 +330,22 @@ class CorreiosService:
                 "events": [],
             }
 
-    def _parse_tracking_response(self, html: str, tracking_code: str) -> dict:
-        """Parse tracking HTML response."""
-        # Simple regex-based parsing for tracking info
-        import re
-        
+    def _parse_tracking_events(self, chunks: Iterable[bytes]) -> List[dict]:
+        """Parse tracking events from HTML chunks, stopping after the events kept."""
         events = []
-        
-        # Pattern to find tracking events
-        # This is a simplified parser - in production, use BeautifulSoup
-        pattern = r'(\d{2}/\d{2}/\d{4})\s+(\d{2}:\d{2})\s*-?\s*([^<]+)'
-        matches = re.findall(pattern, html)
-        
-        for match in matches:
-            date, time, description = match
-            events.append({
-                "date": date,
-                "time": time,
-                "description": description.strip(),
-            })
-
-        return {
-            "code": tracking_code,
-            "events": events[:10],  # Limit to last 10 events
-        }
+
+        try:
+            for text in _iter_html_texts(chunks):
+                for match in _TRACKING_EVENT_RE.finditer(text):
+                    date, time, description = match.groups()
+                    events.append({
+                        "date": date,
+                        "time": time,
+                        "description": description.strip(),
+                    })
+                    if len(events) >= MAX_TRACKING_EVENTS:
+                        return events
+        except etree.LxmlError:
+            logger.warning("Failed to parse tracking page")
+
+        return events
@@ -6,6 +6,7 @@ Views de cálculo de frete.
 import logging
 from decimal import Decimal
 
+from django.db.models import Count
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -131,6 +132,14 @@ class ShippingMethodAdminViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "code", "carrier"]
     ordering = ["name"]
 
+    def get_queryset(self):
+        # Rate counts come from one GROUP BY instead of a COUNT per method
+        # Contagens de taxas vêm de um GROUP BY em vez de um COUNT por método
+        queryset = super().get_queryset().annotate(rates_count_db=Count("rates"))
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("rates")
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return ShippingMethodDetailSerializer
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-16 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhooks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="webhookdelivery",
+            index=models.Index(
+                fields=["endpoint", "-created_at"], name="webhook_delivery_endpoint_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="webhookdelivery",
+            index=models.Index(
+                fields=["success", "-created_at"], name="webhook_delivery_success_idx"
+            ),
+        ),
+    ]
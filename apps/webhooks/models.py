@@ -5,16 +5,67 @@ Modelos de Webhooks para o Backend E-commerce.
 
 import hashlib
 import hmac
-import json
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-from django.db import models
+import orjson
+from django.core.cache import cache
+from django.db import models, transaction
 
 from apps.core.models import BaseModel, TimeStampedModel
+from apps.core.utils import build_http_session
 
 logger = logging.getLogger(__name__)
 
+# Most webhook POSTs in flight at once for one event
+# Máximo de POSTs de webhook simultâneos para um evento
+WEBHOOK_MAX_WORKERS = 16
+
+ACTIVE_ENDPOINTS_CACHE_KEY = "webhook:active"
+ACTIVE_ENDPOINTS_CACHE_TIMEOUT = 60 * 5  # 5 minutes
+
+# Keep-alive session shared by every webhook delivery in this process
+# Sessão keep-alive compartilhada por todas as entregas de webhook do processo
+_SESSION = build_http_session(
+    retries=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)
+)
+
+
+def encode_payload(payload: dict) -> bytes:
+    """
+    Serialize a webhook payload to the compact bytes that are signed and sent.
+    Serializa um payload de webhook nos bytes compactos assinados e enviados.
+    """
+    return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+
+
+@lru_cache(maxsize=256)
+def _hmac_prototype(secret: str):
+    """
+    HMAC-SHA256 already keyed with a secret, to be copied for each payload.
+    HMAC-SHA256 já inicializado com um segredo, copiado para cada payload.
+    """
+    return hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """
+    Hex HMAC-SHA256 of a payload, reusing the keyed state of the secret.
+    HMAC-SHA256 hexadecimal de um payload, reutilizando o estado do segredo.
+    """
+    signer = _hmac_prototype(secret).copy()
+    signer.update(body)
+    return signer.hexdigest()
+
+
+def get_session():
+    """
+    Return the shared HTTP session used for webhook deliveries.
+    Retorna a sessão HTTP compartilhada usada nas entregas de webhook.
+    """
+    return _SESSION
+
 
 class WebhookEndpoint(BaseModel):
     """
@@ -50,25 +101,24 @@ class WebhookEndpoint(BaseModel):
     def __str__(self):
         return self.name
 
-    def send(self, event_type: str, payload: dict):
+    def accepts(self, event_type: str) -> bool:
         """
-        Send webhook to endpoint.
-        Envia webhook para o endpoint.
+        Check whether this endpoint should receive an event.
+        Verifica se este endpoint deve receber um evento.
         """
-        if not self.is_active:
-            return False
+        return self.is_active and (not self.events or event_type in self.events)
 
-        if self.events and event_type not in self.events:
-            return False
+    def deliver(self, event_type: str, payload: dict, body: bytes):
+        """
+        POST an already encoded payload and return the unsaved delivery log.
+        Envia um payload já codificado e retorna o log de entrega não salvo.
 
-        # Generate signature
-        # Gera assinatura (signature)
-        payload_str = json.dumps(payload, sort_keys=True)
-        signature = hmac.new(
-            self.secret.encode(),
-            payload_str.encode(),
-            hashlib.sha256,
-        ).hexdigest()
+        Makes no database queries, so it can run in worker threads.
+        Não faz consultas ao banco, então pode rodar em threads.
+        """
+        # Generate signature over the exact bytes sent
+        # Gera assinatura (signature) sobre os bytes exatos enviados
+        signature = sign_payload(self.secret, body)
 
         headers = {
             "Content-Type": "application/json",
@@ -77,39 +127,42 @@ class WebhookEndpoint(BaseModel):
             **self.custom_headers,
         }
 
+        delivery = WebhookDelivery(
+            endpoint=self,
+            event_type=event_type,
+            payload=payload,
+        )
         try:
-            response = requests.post(
+            response = get_session().post(
                 self.url,
-                json=payload,
+                data=body,
                 headers=headers,
                 timeout=10,
             )
-
-            # Log delivery
-            # Registra entrega (log)
-            WebhookDelivery.objects.create(
-                endpoint=self,
-                event_type=event_type,
-                payload=payload,
-                status_code=response.status_code,
-                response_body=response.text[:1000],
-                success=response.status_code < 400,
-            )
-
-            return response.status_code < 400
-
+            delivery.status_code = response.status_code
+            delivery.response_body = response.text[:1000]
+            delivery.success = response.status_code < 400
         except Exception as e:
             logger.exception(f"Webhook delivery failed: {e}")
-            WebhookDelivery.objects.create(
-                endpoint=self,
-                event_type=event_type,
-                payload=payload,
-                status_code=0,
-                response_body=str(e),
-                success=False,
-            )
+            delivery.status_code = 0
+            delivery.response_body = str(e)
+            delivery.success = False
+        return delivery
+
+    def send(self, event_type: str, payload: dict):
+        """
+        Send webhook to endpoint.
+        Envia webhook para o endpoint.
+        """
+        if not self.accepts(event_type):
             return False
 
+        # Log delivery
+        # Registra entrega (log)
+        delivery = self.deliver(event_type, payload, encode_payload(payload))
+        delivery.save()
+        return delivery.success
+
 
 class WebhookDelivery(TimeStampedModel):
     """
@@ -132,14 +185,81 @@ class WebhookDelivery(TimeStampedModel):
         verbose_name = "Webhook Delivery"
         verbose_name_plural = "Webhook Deliveries"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["endpoint", "-created_at"],
+                name="webhook_delivery_endpoint_idx",
+            ),
+            models.Index(
+                fields=["success", "-created_at"],
+                name="webhook_delivery_success_idx",
+            ),
+        ]
 
 
 def trigger_webhook(event_type: str, payload: dict):
     """
-    Trigger webhooks for an event.
-    Dispara webhooks para um evento.
+    Queue the webhooks for an event once the current transaction commits.
+    Enfileira os webhooks de um evento após o commit da transação atual.
+
+    The payload must be JSON-serializable.
+    O payload deve ser serializável em JSON.
     """
-    endpoints = WebhookEndpoint.objects.filter(is_active=True)
+    from .tasks import deliver_webhooks
+
+    transaction.on_commit(lambda: deliver_webhooks.delay(event_type, payload))
+
 
-    for endpoint in endpoints:
-        endpoint.send(event_type, payload)
+def dispatch_webhooks(event_type: str, payload: dict):
+    """
+    Send an event to every subscribed endpoint and log the deliveries.
+    Envia um evento a todos os endpoints inscritos e registra as entregas.
+
+    Returns the saved WebhookDelivery rows.
+    Retorna as linhas de WebhookDelivery salvas.
+    """
+    # The active endpoints are a tiny, rarely changed list; keep it cached
+    # Os endpoints ativos são uma lista pequena e estável; fica em cache
+    active = cache.get(ACTIVE_ENDPOINTS_CACHE_KEY)
+    if active is None:
+        active = list(
+            WebhookEndpoint.objects.filter(is_active=True).only(
+                "id", "url", "secret", "is_active", "events", "custom_headers"
+            )
+        )
+        cache.set(
+            ACTIVE_ENDPOINTS_CACHE_KEY, active, ACTIVE_ENDPOINTS_CACHE_TIMEOUT
+        )
+
+    endpoints = [endpoint for endpoint in active if endpoint.accepts(event_type)]
+    if not endpoints:
+        return []
+
+    # Encode once, POST to every endpoint concurrently, log in one INSERT
+    # Codifica uma vez, envia a todos os endpoints em paralelo, registra em um INSERT
+    body = encode_payload(payload)
+    workers = min(WEBHOOK_MAX_WORKERS, len(endpoints))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        deliveries = list(
+            executor.map(
+                lambda endpoint: endpoint.deliver(event_type, payload, body),
+                endpoints,
+            )
+        )
+    return WebhookDelivery.objects.bulk_create(deliveries, batch_size=500)
+
+
+# Signals to invalidate the cached active endpoints
+# Signals para invalidar os endpoints ativos em cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=WebhookEndpoint)
+@receiver(post_delete, sender=WebhookEndpoint)
+def invalidate_active_endpoints_cache(sender, instance, **kwargs):
+    """
+    Drop the cached active endpoints once the write is committed.
+    Remove os endpoints ativos em cache após o commit da escrita.
+    """
+    transaction.on_commit(lambda: cache.delete(ACTIVE_ENDPOINTS_CACHE_KEY))
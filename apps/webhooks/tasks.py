@@ -0,0 +1,49 @@
+"""
+Celery tasks for the webhooks app.
+"""
+
+from celery import shared_task
+
+WEBHOOK_RETRY_DELAY = 30  # seconds, doubled on every retry
+
+
+def is_retryable(delivery) -> bool:
+    """Whether a failed delivery may succeed later (network error or 5xx)."""
+    return delivery.status_code == 0 or delivery.status_code >= 500
+
+
+@shared_task(ignore_result=True)
+def deliver_webhooks(event_type: str, payload: dict):
+    """
+    Send an event to every subscribed endpoint.
+
+    Endpoints that failed with a network error or a 5xx get their own
+    retry task, so endpoints that accepted the event are not sent it again.
+    """
+    from .models import dispatch_webhooks
+
+    for delivery in dispatch_webhooks(event_type, payload):
+        if is_retryable(delivery):
+            retry_webhook.apply_async(
+                (delivery.endpoint_id, event_type, payload),
+                countdown=WEBHOOK_RETRY_DELAY,
+            )
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True)
+def retry_webhook(self, endpoint_id: int, event_type: str, payload: dict):
+    """
+    Send an event to one endpoint again, backing off exponentially.
+    """
+    from .models import WebhookEndpoint, encode_payload
+
+    endpoint = WebhookEndpoint.objects.filter(pk=endpoint_id).first()
+    if endpoint is None or not endpoint.accepts(event_type):
+        return
+
+    delivery = endpoint.deliver(event_type, payload, encode_payload(payload))
+    delivery.save()
+    if is_retryable(delivery):
+        raise self.retry(
+            countdown=WEBHOOK_RETRY_DELAY * 2 ** (self.request.retries + 1)
+        )
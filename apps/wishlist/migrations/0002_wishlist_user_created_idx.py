@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-16 00:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0013_productexport"),
+        ("wishlist", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wishlistitem",
+            index=models.Index(
+                fields=["user", "-created_at"], name="wishlist_user_created_idx"
+            ),
+        ),
+    ]
@@ -4,10 +4,21 @@ Modelos de lista de desejos para o Backend E-commerce.
 """
 
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 
 from apps.core.models import TimeStampedModel
 
+WISHLIST_CHECK_CACHE_TIMEOUT = 60  # 1 minute
+
+
+def wishlist_check_cache_key(user_id, product_id):
+    """
+    Cache key of the "is this product in the wishlist" flag.
+    Chave de cache do indicador "este produto está na lista de desejos".
+    """
+    return f"wishlist:{user_id}:{product_id}"
+
 
 class WishlistItem(TimeStampedModel):
     """
@@ -31,6 +42,28 @@ class WishlistItem(TimeStampedModel):
         verbose_name_plural = "Wishlist Items"
         unique_together = ["user", "product"]
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"], name="wishlist_user_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.product.name}"
+
+
+# Signals to invalidate the cached wishlist flags
+# Signals para invalidar os indicadores de lista de desejos em cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_delete, sender=WishlistItem)
+def invalidate_wishlist_check_cache(sender, instance, **kwargs):
+    """
+    Drop the cached wishlist flag once the write is committed.
+    Remove o indicador da lista de desejos em cache após o commit da escrita.
+    """
+    key = wishlist_check_cache_key(instance.user_id, instance.product_id)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -3,13 +3,20 @@ Views for the wishlist app.
 Views para o app de lista de desejos.
 """
 
+from django.core.cache import cache
+from django.db.models import Prefetch
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.products.models import Product
+from apps.products.serializers import PRODUCT_LIST_FIELDS
 
-from .models import WishlistItem
+from .models import (
+    WISHLIST_CHECK_CACHE_TIMEOUT,
+    WishlistItem,
+    wishlist_check_cache_key,
+)
 from .serializers import WishlistAddSerializer, WishlistItemSerializer
 
 
@@ -22,7 +29,21 @@ class WishlistView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        items = WishlistItem.objects.filter(user=request.user).select_related("product")
+        # Products load like the product list: only the serialized columns,
+        # with category, brand and primary image in the same batch
+        # Produtos carregados como na listagem: apenas as colunas serializadas,
+        # com categoria, marca e imagem principal no mesmo lote
+        products = (
+            Product.all_objects.select_related("category", "brand")
+            .with_primary_image()
+            .with_display_fields()
+            .only(*PRODUCT_LIST_FIELDS)
+        )
+        items = (
+            WishlistItem.objects.filter(user=request.user)
+            .only("id", "product", "created_at")
+            .prefetch_related(Prefetch("product", queryset=products))
+        )
         serializer = WishlistItemSerializer(items, many=True)
         return Response({"success": True, "data": serializer.data})
 
@@ -104,8 +125,14 @@ class WishlistCheckView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, product_id):
-        in_wishlist = WishlistItem.objects.filter(
-            user=request.user,
-            product_id=product_id,
-        ).exists()
+        # Product pages check on every view; cache the flag briefly
+        # Páginas de produto verificam a cada visita; o indicador fica em cache
+        key = wishlist_check_cache_key(request.user.id, product_id)
+        in_wishlist = cache.get(key)
+        if in_wishlist is None:
+            in_wishlist = WishlistItem.objects.filter(
+                user=request.user,
+                product_id=product_id,
+            ).exists()
+            cache.set(key, in_wishlist, WISHLIST_CHECK_CACHE_TIMEOUT)
         return Response({"success": True, "in_wishlist": in_wishlist})
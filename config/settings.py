@@ -166,6 +166,38 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Generated exports go to S3 (served by pre-signed URLs) when a bucket is set,
+# otherwise to a private directory outside MEDIA_ROOT that is only served
+# through the admin download endpoint
+EXPORTS_BUCKET_NAME = env("EXPORTS_BUCKET_NAME", default="")
+PRIVATE_MEDIA_ROOT = BASE_DIR / "private_media"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "exports": (
+        {
+            "BACKEND": "storages.backends.s3.S3Storage",
+            "OPTIONS": {
+                "bucket_name": EXPORTS_BUCKET_NAME,
+                "querystring_auth": True,
+                "querystring_expire": 60 * 60,  # 1 hour
+                "default_acl": "private",
+                "file_overwrite": False,
+            },
+        }
+        if EXPORTS_BUCKET_NAME
+        else {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": PRIVATE_MEDIA_ROOT},
+        }
+    ),
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -184,6 +216,11 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.core.parsers.OrjsonParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
@@ -311,6 +348,7 @@ DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="noreply@ecommerce.com")
 
 # Payment Gateways
 MERCADOPAGO_ACCESS_TOKEN = env("MERCADOPAGO_ACCESS_TOKEN", default="")
+MERCADOPAGO_WEBHOOK_SECRET = env("MERCADOPAGO_WEBHOOK_SECRET", default="")
 PAGSEGURO_EMAIL = env("PAGSEGURO_EMAIL", default="")
 PAGSEGURO_TOKEN = env("PAGSEGURO_TOKEN", default="")
 STRIPE_SECRET_KEY = env("STRIPE_SECRET_KEY", default="")
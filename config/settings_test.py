@@ -0,0 +1,44 @@
+"""
+Django settings for the test suite.
+
+Runs on an in-memory SQLite database; nothing in the tests relies on
+PostgreSQL-only features. Redis, throttling, login lockouts and log
+files are left out so requests only exercise views and serializers.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Tasks run inline instead of going through the Redis broker
+CELERY_TASK_ALWAYS_EAGER = True
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_CLASSES": [],
+    "DEFAULT_THROTTLE_RATES": {},
+}
+
+AXES_ENABLED = False
+
+# Single-round hasher; the production ones are slow by design
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Warnings and errors only, and nothing written under logs/
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "root": {"level": "WARNING"},
+}
@@ -5,39 +5,40 @@ Pytest configuration and fixtures for E-commerce Backend tests.
 import pytest
 from decimal import Decimal
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
+from django.contrib.auth.hashers import make_password
+from django.urls import resolve
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
 
+USER_PASSWORD = "TestPass123!"
+ADMIN_PASSWORD = "AdminPass123!"
 
 
-@pytest.fixture(autouse=True)
-def disable_throttling(settings):
-    """Disable throttling and Axes for all tests."""
-    settings.AXES_ENABLED = False
-    settings.REST_FRAMEWORK = {
-        'DEFAULT_AUTHENTICATION_CLASSES': (
-            'rest_framework_simplejwt.authentication.JWTAuthentication',
-        ),
-        'DEFAULT_PERMISSION_CLASSES': (
-            'rest_framework.permissions.IsAuthenticated',
-        ),
-        # Remove throttling
-    }
-
 @pytest.fixture
 def api_client():
-    """Return an unauthenticated API client."""
-    return APIClient()
+    """Return an unauthenticated API client that posts JSON, as the frontend does."""
+    client = APIClient()
+    client.default_format = "json"
+    return client
+
+
+@pytest.fixture(scope="session")
+def password_hashes():
+    """Hash the fixture passwords once per session; hashing dominates user setup."""
+    return {
+        password: make_password(password)
+        for password in (USER_PASSWORD, ADMIN_PASSWORD)
+    }
 
 
 @pytest.fixture
-def user(db):
+def user(db, password_hashes):
     """Create and return a regular user."""
-    return User.objects.create_user(
+    return User.objects.create(
         email="testuser@example.com",
-        password="TestPass123!",
+        password=password_hashes[USER_PASSWORD],
         first_name="Test",
         last_name="User",
         is_verified=True,
@@ -45,16 +46,38 @@ def user(db):
 
 
 @pytest.fixture
-def admin_user(db):
+def admin_user(db, password_hashes):
     """Create and return an admin user."""
-    return User.objects.create_superuser(
+    return User.objects.create(
         email="admin@example.com",
-        password="AdminPass123!",
+        password=password_hashes[ADMIN_PASSWORD],
         first_name="Admin",
         last_name="User",
+        is_staff=True,
+        is_superuser=True,
+        user_type="admin",
     )
 
 
+@pytest.fixture
+def post_to_view():
+    """
+    Return a helper that posts JSON straight to the view behind a URL.
+
+    Skips the middleware stack; keep APIClient for end-to-end tests.
+    """
+    factory = APIRequestFactory()
+
+    def post(path, data, user=None):
+        request = factory.post(path, data, format="json")
+        if user is not None:
+            force_authenticate(request, user=user)
+        match = resolve(path)
+        return match.func(request, *match.args, **match.kwargs)
+
+    return post
+
+
 @pytest.fixture
 def authenticated_client(api_client, user):
     """Return an authenticated API client."""
@@ -130,15 +153,36 @@ def cart(db, user):
 
 @pytest.fixture
 def cart_with_items(db, cart, product_with_stock):
-    """Create and return a cart with items."""
-    from apps.cart.models import CartItem
+    """Create and return a cart with its items and their products prefetched."""
+    from apps.cart.models import Cart, CartItem
     CartItem.objects.create(
         cart=cart,
         product=product_with_stock,
         quantity=2,
         unit_price=product_with_stock.current_price,
     )
-    return cart
+    return Cart.objects.prefetch_related("items__product").get(pk=cart.pk)
+
+
+@pytest.fixture
+def order(db, user):
+    """Create and return a pending order for the user."""
+    from apps.orders.models import Order
+    return Order.objects.create(
+        user=user,
+        subtotal=Decimal("100.00"),
+        shipping_cost=Decimal("10.00"),
+        total=Decimal("110.00"),
+        shipping_address={
+            "recipient_name": "Test User",
+            "street": "Av. Paulista",
+            "number": "1000",
+            "neighborhood": "Bela Vista",
+            "city": "São Paulo",
+            "state": "SP",
+            "zipcode": "01310100",
+        },
+    )
 
 
 @pytest.fixture
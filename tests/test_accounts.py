@@ -28,7 +28,7 @@ class TestUserRegistration:
         assert response.data["success"] is True
         assert User.objects.filter(email="newuser@example.com").exists()
 
-    def test_register_user_password_mismatch(self, api_client):
+    def test_register_user_password_mismatch(self, post_to_view):
         """Test registration with mismatched passwords."""
         data = {
             "email": "newuser@example.com",
@@ -37,11 +37,11 @@ class TestUserRegistration:
             "first_name": "New",
             "last_name": "User",
         }
-        response = api_client.post("/api/v1/auth/register/", data)
+        response = post_to_view("/api/v1/auth/register/", data)
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
-    def test_register_user_duplicate_email(self, api_client, user):
+    def test_register_user_duplicate_email(self, post_to_view, user):
         """Test registration with existing email."""
         data = {
             "email": user.email,
@@ -50,7 +50,7 @@ class TestUserRegistration:
             "first_name": "New",
             "last_name": "User",
         }
-        response = api_client.post("/api/v1/auth/register/", data)
+        response = post_to_view("/api/v1/auth/register/", data)
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
@@ -71,31 +71,31 @@ class TestUserLogin:
         assert "access" in response.data
         assert "refresh" in response.data
 
-    def test_login_invalid_password(self, api_client, user):
+    def test_login_invalid_password(self, post_to_view, user):
         """Test login with wrong password."""
         data = {
             "email": user.email,
             "password": "WrongPassword123!",
         }
-        response = api_client.post("/api/v1/auth/login/", data)
+        response = post_to_view("/api/v1/auth/login/", data)
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
-    def test_login_nonexistent_user(self, api_client):
+    def test_login_nonexistent_user(self, post_to_view):
         """Test login with non-existent user."""
         data = {
             "email": "nonexistent@example.com",
             "password": "SomePass123!",
         }
-        response = api_client.post("/api/v1/auth/login/", data)
+        response = post_to_view("/api/v1/auth/login/", data)
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
-@pytest.mark.django_db
 class TestUserProfile:
     """Tests for user profile endpoints."""
 
+    @pytest.mark.django_db
     def test_get_profile_authenticated(self, authenticated_client, user):
         """Test getting profile when authenticated."""
         response = authenticated_client.get("/api/v1/auth/me/")
@@ -110,6 +110,7 @@ class TestUserProfile:
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
+    @pytest.mark.django_db
     def test_update_profile(self, authenticated_client, user):
         """Test updating user profile."""
         data = {"first_name": "Updated"}
@@ -117,7 +118,7 @@ class TestUserProfile:
         
         assert response.status_code == status.HTTP_200_OK
         assert response.data["success"] is True
-        user.refresh_from_db()
+        user.refresh_from_db(fields=["first_name"])
         assert user.first_name == "Updated"
 
 
@@ -65,10 +65,10 @@ class TestCartItems:
 class TestCartCoupon:
     """Tests for cart coupon operations."""
 
-    def test_apply_invalid_coupon(self, authenticated_client, cart_with_items):
+    def test_apply_invalid_coupon(self, post_to_view, user, cart_with_items):
         """Test applying an invalid coupon."""
         data = {"code": "INVALIDCODE"}
-        response = authenticated_client.post("/api/v1/cart/coupon/", data)
+        response = post_to_view("/api/v1/cart/coupon/", data, user=user)
         
         assert response.status_code in [
             status.HTTP_400_BAD_REQUEST,
@@ -80,14 +80,15 @@ class TestCartCoupon:
 class TestCartModels:
     """Tests for Cart model calculations."""
 
-    def test_cart_subtotal(self, cart_with_items, product_with_stock):
-        """Test cart subtotal calculation."""
+    def test_cart_totals_without_coupon(
+        self, cart_with_items, product_with_stock, django_assert_num_queries
+    ):
+        """Test cart subtotal and total without coupon, from prefetched items."""
         expected_subtotal = product_with_stock.current_price * 2
-        assert cart_with_items.subtotal == expected_subtotal
-
-    def test_cart_total_without_coupon(self, cart_with_items):
-        """Test cart total without coupon."""
-        assert cart_with_items.total == cart_with_items.subtotal
+        with django_assert_num_queries(0):
+            assert cart_with_items.subtotal == expected_subtotal
+            assert cart_with_items.total == expected_subtotal
+            assert cart_with_items.item_count == 2
 
     def test_cart_with_coupon_discount(self, cart_with_items, coupon):
         """Test cart discount with coupon."""
@@ -5,96 +5,100 @@ Tests for core utilities.
 import pytest
 from decimal import Decimal
 
+from apps.core.utils import (
+    assign_unique_slugs,
+    calculate_discount_percentage,
+    format_cep,
+    format_cpf,
+    format_currency,
+    format_phone,
+    generate_order_number,
+    normalize_cep,
+    validate_cnpj,
+    validate_cpf,
+)
+
 
 class TestCPFValidation:
     """Tests for CPF validation."""
 
-    def test_valid_cpf(self):
-        """Test valid CPF numbers."""
-        from apps.core.utils import validate_cpf
-        
-        # Valid CPF numbers
-        assert validate_cpf("529.982.247-25") is True
-        assert validate_cpf("52998224725") is True
-
-    def test_invalid_cpf(self):
-        """Test invalid CPF numbers."""
-        from apps.core.utils import validate_cpf
-        
-        # Invalid CPF numbers
-        assert validate_cpf("111.111.111-11") is False
-        assert validate_cpf("123.456.789-00") is False
-        assert validate_cpf("12345") is False
+    @pytest.mark.parametrize(
+        "cpf,expected",
+        [
+            ("529.982.247-25", True),
+            ("52998224725", True),
+            ("111.111.111-11", False),
+            ("123.456.789-00", False),
+            ("12345", False),
+        ],
+    )
+    def test_validate_cpf(self, cpf, expected):
+        """Test CPF validation."""
+        assert validate_cpf(cpf) is expected
 
     def test_cpf_formatting(self):
         """Test CPF formatting."""
-        from apps.core.utils import format_cpf
-        
         assert format_cpf("52998224725") == "529.982.247-25"
 
 
 class TestCNPJValidation:
     """Tests for CNPJ validation."""
 
-    def test_valid_cnpj(self):
-        """Test valid CNPJ numbers."""
-        from apps.core.utils import validate_cnpj
-        
-        # Valid CNPJ
-        assert validate_cnpj("11.222.333/0001-81") is True
-        assert validate_cnpj("11222333000181") is True
-
-    def test_invalid_cnpj(self):
-        """Test invalid CNPJ numbers."""
-        from apps.core.utils import validate_cnpj
-        
-        # Invalid CNPJ numbers
-        assert validate_cnpj("11.111.111/1111-11") is False
-        assert validate_cnpj("12.345.678/0001-00") is False
+    @pytest.mark.parametrize(
+        "cnpj,expected",
+        [
+            ("11.222.333/0001-81", True),
+            ("11222333000181", True),
+            ("11.111.111/1111-11", False),
+            ("12.345.678/0001-00", False),
+        ],
+    )
+    def test_validate_cnpj(self, cnpj, expected):
+        """Test CNPJ validation."""
+        assert validate_cnpj(cnpj) is expected
 
 
 class TestCurrencyFormatting:
     """Tests for currency formatting."""
 
-    def test_format_currency(self):
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            (Decimal("1234.56"), "R$ 1.234,56"),
+            (Decimal("99.90"), "R$ 99,90"),
+            (Decimal("0.01"), "R$ 0,01"),
+        ],
+    )
+    def test_format_currency(self, value, expected):
         """Test Brazilian currency formatting."""
-        from apps.core.utils import format_currency
-        
-        assert format_currency(Decimal("1234.56")) == "R$ 1.234,56"
-        assert format_currency(Decimal("99.90")) == "R$ 99,90"
-        assert format_currency(Decimal("0.01")) == "R$ 0,01"
+        assert format_currency(value) == expected
 
 
 class TestPhoneFormatting:
     """Tests for phone number formatting."""
 
-    def test_format_phone_11_digits(self):
-        """Test 11-digit phone formatting."""
-        from apps.core.utils import format_phone
-        
-        assert format_phone("11987654321") == "(11) 98765-4321"
-
-    def test_format_phone_10_digits(self):
-        """Test 10-digit phone formatting."""
-        from apps.core.utils import format_phone
-        
-        assert format_phone("1133334444") == "(11) 3333-4444"
+    @pytest.mark.parametrize(
+        "phone,expected",
+        [
+            ("11987654321", "(11) 98765-4321"),  # 11 digits
+            ("1133334444", "(11) 3333-4444"),  # 10 digits
+        ],
+    )
+    def test_format_phone(self, phone, expected):
+        """Test phone formatting."""
+        assert format_phone(phone) == expected
 
 
 class TestCEPFormatting:
     """Tests for CEP (postal code) formatting."""
 
-    def test_normalize_cep(self):
+    @pytest.mark.parametrize("cep", ["01310-100", "01310100"])
+    def test_normalize_cep(self, cep):
         """Test CEP normalization."""
-        from apps.core.utils import normalize_cep
-        
-        assert normalize_cep("01310-100") == "01310100"
-        assert normalize_cep("01310100") == "01310100"
+        assert normalize_cep(cep) == "01310100"
 
     def test_format_cep(self):
         """Test CEP formatting."""
-        from apps.core.utils import format_cep
-        
         assert format_cep("01310100") == "01310-100"
 
 
@@ -103,8 +107,6 @@ class TestOrderNumberGeneration:
 
     def test_generate_order_number_format(self):
         """Test order number format."""
-        from apps.core.utils import generate_order_number
-        
         order_number = generate_order_number()
         
         assert order_number.startswith("ORD-")
@@ -115,32 +117,41 @@ class TestOrderNumberGeneration:
 
     def test_generate_order_number_unique(self):
         """Test that order numbers are unique."""
-        from apps.core.utils import generate_order_number
+        numbers = {generate_order_number() for _ in range(100)}
         
-        numbers = [generate_order_number() for _ in range(100)]
-        
-        assert len(set(numbers)) == 100  # All unique
+        assert len(numbers) == 100  # All unique
 
 
 class TestDiscountCalculation:
     """Tests for discount percentage calculation."""
 
-    def test_calculate_discount_percentage(self):
+    @pytest.mark.parametrize(
+        "original,sale,expected",
+        [
+            (Decimal("100"), Decimal("90"), 10),
+            (Decimal("200"), Decimal("150"), 25),
+            (Decimal("100"), Decimal("50"), 50),
+            (Decimal("100"), Decimal("100"), None),  # Same price
+            (Decimal("100"), Decimal("120"), None),  # Higher sale price (invalid)
+        ],
+    )
+    def test_calculate_discount_percentage(self, original, sale, expected):
         """Test discount percentage calculation."""
-        from apps.core.utils import calculate_discount_percentage
-        
-        # 10% discount
-        assert calculate_discount_percentage(Decimal("100"), Decimal("90")) == 10
-        # 25% discount
-        assert calculate_discount_percentage(Decimal("200"), Decimal("150")) == 25
-        # 50% discount
-        assert calculate_discount_percentage(Decimal("100"), Decimal("50")) == 50
-
-    def test_no_discount(self):
-        """Test when there's no discount."""
-        from apps.core.utils import calculate_discount_percentage
-        
-        # Same price
-        assert calculate_discount_percentage(Decimal("100"), Decimal("100")) is None
-        # Higher sale price (invalid)
-        assert calculate_discount_percentage(Decimal("100"), Decimal("120")) is None
+        assert calculate_discount_percentage(original, sale) == expected
+
+
+@pytest.mark.django_db
+class TestAssignUniqueSlugs:
+    """Tests for batch slug assignment."""
+
+    def test_symbol_only_names_get_a_slug(self, category, brand):
+        """Test that names slugifying to "" fall back to the SKU."""
+        from apps.products.models import Product
+
+        products = [
+            Product(name="!!!", sku=sku, category=category, brand=brand)
+            for sku in ("SKU-1", "SKU-2")
+        ]
+        assign_unique_slugs(products)
+
+        assert [p.slug for p in products] == ["sku-1", "sku-2"]
@@ -0,0 +1,56 @@
+"""
+Tests for the database migrations.
+
+The suite builds its schema straight from the models (--nomigrations), which
+skips generated columns, partial constraints and data migrations. These tests
+apply the real migrations to a separate in-memory database instead.
+"""
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+MIGRATIONS_ALIAS = "migrations"
+
+
+class MigrationsRouter:
+    """Send the RunPython queries of historical models to the migrations database."""
+
+    def db_for_read(self, model, **hints):
+        return MIGRATIONS_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return MIGRATIONS_ALIAS
+
+
+@pytest.fixture
+def migrations_connection(settings, monkeypatch, django_db_blocker):
+    """A fresh in-memory database, with migrations enabled for the loader."""
+    settings.MIGRATION_MODULES = {}
+    settings.DATABASE_ROUTERS = [MigrationsRouter()]
+    monkeypatch.setitem(
+        connections.settings,
+        MIGRATIONS_ALIAS,
+        {**connections.settings["default"], "NAME": ":memory:"},
+    )
+    with django_db_blocker.unblock():
+        connection = connections[MIGRATIONS_ALIAS]
+        yield connection
+        connection.close()
+    del connections[MIGRATIONS_ALIAS]
+
+
+def test_migrations_apply(migrations_connection):
+    """Test that every migration applies cleanly to an empty database."""
+    executor = MigrationExecutor(migrations_connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    executor.loader.build_graph()
+    assert executor.migration_plan(executor.loader.graph.leaf_nodes()) == []
+
+
+def test_no_missing_migrations(db, settings):
+    """Test that the models have no changes without a migration."""
+    settings.MIGRATION_MODULES = {}
+    call_command("makemigrations", "--check", "--dry-run", verbosity=0)
@@ -0,0 +1,203 @@
+"""
+Tests for the payments app.
+"""
+
+import pytest
+from unittest.mock import patch
+from django.db import connection
+from rest_framework import status
+
+
+class FakeGateway:
+    """Gateway stub recording how create_payment was called."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def create_payment(self, **kwargs):
+        self.calls.append(
+            {"in_transaction": connection.in_atomic_block, **kwargs}
+        )
+        return self.result
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCreatePayment:
+    """Tests for payment creation endpoint."""
+
+    def test_gateway_called_outside_transaction(self, authenticated_client, order):
+        """Test that no transaction or order lock is held during the gateway call."""
+        from apps.payments.gateways.base import PaymentResult
+        from apps.payments.models import Payment
+
+        gateway = FakeGateway(
+            PaymentResult(
+                success=True,
+                payment_id="123",
+                status="approved",
+                data={"gateway_status": "approved"},
+            )
+        )
+        data = {"order_id": order.id, "gateway": "mercadopago", "method": "pix"}
+        with patch("apps.payments.views.get_gateway", return_value=gateway):
+            response = authenticated_client.post(
+                "/api/v1/payments/", data, HTTP_IDEMPOTENCY_KEY="key-1"
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert gateway.calls[0]["in_transaction"] is False
+        assert gateway.calls[0]["idempotency_key"] == "key-1"
+        assert Payment.objects.get(order=order).gateway_payment_id == "123"
+        order.refresh_from_db(fields=["status"])
+        assert order.status == "paid"
+
+    def test_rejected_payment_recorded(self, authenticated_client, order):
+        """Test that a declined attempt is stored and leaves the order payable."""
+        from apps.payments.gateways.base import PaymentResult
+        from apps.payments.models import Payment
+
+        gateway = FakeGateway(
+            PaymentResult(success=False, status="rejected", message="Declined")
+        )
+        data = {"order_id": order.id, "gateway": "mercadopago", "method": "pix"}
+        with patch("apps.payments.views.get_gateway", return_value=gateway):
+            response = authenticated_client.post("/api/v1/payments/", data)
+
+        assert response.status_code == status.HTTP_402_PAYMENT_REQUIRED
+        assert Payment.objects.get(order=order).status == "rejected"
+        order.refresh_from_db(fields=["status"])
+        assert order.status == "pending"
+
+    def test_concurrent_submit_without_key_charges_once(
+        self, authenticated_client, order
+    ):
+        """Test that a second submit during the gateway call is refused."""
+        from apps.payments.gateways.base import PaymentResult
+        from apps.payments.models import Payment
+
+        data = {"order_id": order.id, "gateway": "mercadopago", "method": "pix"}
+        second = {}
+
+        class ResubmittingGateway(FakeGateway):
+            def create_payment(self, **kwargs):
+                # The customer clicks "pay" again while the first call runs
+                second["response"] = authenticated_client.post(
+                    "/api/v1/payments/", data
+                )
+                return super().create_payment(**kwargs)
+
+        gateway = ResubmittingGateway(
+            PaymentResult(success=True, payment_id="123", status="approved")
+        )
+        with patch("apps.payments.views.get_gateway", return_value=gateway):
+            response = authenticated_client.post("/api/v1/payments/", data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert second["response"].status_code == status.HTTP_409_CONFLICT
+        assert len(gateway.calls) == 1
+        assert Payment.objects.filter(order=order).count() == 1
+
+
+class TestMercadoPagoWebhook:
+    """Tests for Mercado Pago webhook signature checks."""
+
+    body = b'{"action": "payment.updated", "data": {"id": "123"}}'
+
+    def make_gateway(self, settings, secret):
+        from apps.payments.gateways.mercadopago import MercadoPagoGateway
+
+        settings.MERCADOPAGO_WEBHOOK_SECRET = secret
+        return MercadoPagoGateway()
+
+    def sign(self, secret, ts="1700000000"):
+        import hashlib
+        import hmac
+
+        manifest = f"id:123;request-id:req-1;ts:{ts};"
+        v1 = hmac.new(secret.encode(), manifest.encode(), hashlib.sha256).hexdigest()
+        return f"ts={ts},v1={v1}"
+
+    def test_rejects_webhook_without_secret(self, settings):
+        """Test that webhooks are refused when no secret is configured."""
+        settings.DEBUG = False
+        gateway = self.make_gateway(settings, "")
+
+        with patch.object(gateway, "get_payment_status") as get_status:
+            result = gateway.process_webhook(self.body, None, request_id="req-1")
+
+        assert "error" in result
+        get_status.assert_not_called()
+
+    def test_rejects_badly_signed_webhook(self, settings):
+        """Test that a signature made with another secret is refused."""
+        gateway = self.make_gateway(settings, "secret")
+
+        with patch.object(gateway, "get_payment_status") as get_status:
+            result = gateway.process_webhook(
+                self.body, self.sign("other"), request_id="req-1"
+            )
+
+        assert result == {"error": "Invalid signature"}
+        get_status.assert_not_called()
+
+    def test_accepts_signed_webhook(self, settings):
+        """Test that a valid signature reads the status from the API."""
+        gateway = self.make_gateway(settings, "secret")
+
+        with patch.object(
+            gateway, "get_payment_status", return_value={"id": "123"}
+        ) as get_status:
+            result = gateway.process_webhook(
+                self.body, self.sign("secret"), request_id="req-1"
+            )
+
+        assert result == {"id": "123"}
+        get_status.assert_called_once_with("123")
+
+
+class TestStripeCustomer:
+    """Tests for the Stripe customer lookup."""
+
+    def test_reuses_existing_stripe_customer(self):
+        """Test that a customer already on Stripe is reused, not recreated."""
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+
+        from django.core.cache import cache
+
+        from apps.payments.gateways.stripe import StripeGateway
+
+        cache.clear()
+        gateway = StripeGateway()
+        gateway.stripe = MagicMock()
+        gateway.stripe.Customer.list.return_value = SimpleNamespace(
+            data=[SimpleNamespace(id="cus_existing")]
+        )
+
+        customer_id = gateway._get_or_create_customer({"email": "a@example.com"})
+
+        assert customer_id == "cus_existing"
+        gateway.stripe.Customer.create.assert_not_called()
+
+    def test_create_uses_namespaced_idempotency_key(self):
+        """Test that customer creation does not reuse the cache key."""
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+
+        from django.core.cache import cache
+
+        from apps.payments.gateways.stripe import StripeGateway
+
+        cache.clear()
+        gateway = StripeGateway()
+        gateway.stripe = MagicMock()
+        gateway.stripe.Customer.list.return_value = SimpleNamespace(data=[])
+        gateway.stripe.Customer.create.return_value = SimpleNamespace(id="cus_new")
+
+        customer_id = gateway._get_or_create_customer({"email": "a@example.com"})
+
+        assert customer_id == "cus_new"
+        key = gateway.stripe.Customer.create.call_args.kwargs["idempotency_key"]
+        assert key.startswith("stripe:customer:create:")
+        assert key != gateway._customer_cache_key("a@example.com")
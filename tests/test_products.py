@@ -39,6 +39,62 @@ class TestProductList:
         
         assert response.status_code == status.HTTP_200_OK
 
+    def test_list_products_query_count(
+        self, api_client, category, brand, django_assert_max_num_queries
+    ):
+        """Test that the product list query count does not grow with rows."""
+        from apps.products.models import Product, ProductImage
+
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                sku=f"SKU-{i}",
+                category=category,
+                brand=brand,
+                base_price=Decimal("100.00"),
+                is_active=True,
+            )
+            for i in range(20)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image="products/p.jpg", is_primary=True)
+            for product in products
+        )
+
+        with django_assert_max_num_queries(3):
+            response = api_client.get("/api/v1/products/")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_products_unknown_field_query_count(
+        self, api_client, category, brand, django_assert_max_num_queries
+    ):
+        """Test that an unknown ?fields= name keeps the primary image prefetch."""
+        from apps.products.models import Product, ProductImage
+
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                sku=f"SKU-{i}",
+                category=category,
+                brand=brand,
+                base_price=Decimal("100.00"),
+                is_active=True,
+            )
+            for i in range(20)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image="products/p.jpg", is_primary=True)
+            for product in products
+        )
+
+        with django_assert_max_num_queries(3):
+            response = api_client.get("/api/v1/products/?fields=bogus")
+
+        assert response.status_code == status.HTTP_200_OK
+
 
 @pytest.mark.django_db
 class TestProductDetail:
@@ -69,6 +125,30 @@ class TestCategories:
         
         assert response.status_code == status.HTTP_200_OK
 
+    def test_category_products_ignores_ordering(self, api_client, product, category):
+        """Test that category ordering fields are not applied to its products."""
+        response = api_client.get(
+            f"/api/v1/products/categories/{category.slug}/products/?ordering=parent"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_categories_query_count(
+        self, api_client, category, django_assert_max_num_queries
+    ):
+        """Test that listing categories does not query once per child."""
+        from apps.products.models import Category
+
+        for i in range(3):
+            Category.objects.create(
+                name=f"Child {i}", slug=f"child-{i}", parent=category, is_active=True
+            )
+
+        with django_assert_max_num_queries(3):
+            response = api_client.get("/api/v1/products/categories/")
+
+        assert response.status_code == status.HTTP_200_OK
+
 
 @pytest.mark.django_db
 class TestProductReviews:
@@ -93,6 +173,103 @@ class TestProductReviews:
         
         assert response.status_code == status.HTTP_200_OK
 
+    def test_admin_approve_updates_review_stats(self, product, user, admin_user):
+        """Test that approving reviews in the admin refreshes the product stats."""
+        from django.contrib import admin
+
+        from apps.products.admin import ProductReviewAdmin
+        from apps.products.models import ProductReview
+
+        for reviewer, rating in ((user, 5), (admin_user, 3)):
+            ProductReview.objects.create(
+                product=product, user=reviewer, rating=rating, title="T", comment="C"
+            )
+        model_admin = ProductReviewAdmin(ProductReview, admin.site)
+
+        model_admin.approve_reviews(None, ProductReview.objects.all())
+        product.refresh_from_db(fields=["avg_rating", "review_count"])
+        assert product.review_count == 2
+        assert product.avg_rating == 4
+
+        model_admin.reject_reviews(None, ProductReview.objects.filter(user=user))
+        product.refresh_from_db(fields=["avg_rating", "review_count"])
+        assert product.review_count == 1
+        assert product.avg_rating == 3
+
+    def test_list_product_reviews_ignores_ordering(self, api_client, product):
+        """Test that product ordering fields are not applied to reviews."""
+        response = api_client.get(
+            f"/api/v1/products/{product.slug}/reviews/?ordering=name"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestProductExport:
+    """Tests for the admin products CSV export."""
+
+    @pytest.fixture(autouse=True)
+    def export_storage(self, monkeypatch, tmp_path):
+        """Write export files under tmp_path instead of PRIVATE_MEDIA_ROOT."""
+        from django.core.files.storage import FileSystemStorage
+
+        from apps.products.models import ProductExport
+
+        field = ProductExport._meta.get_field("file")
+        monkeypatch.setattr(field, "storage", FileSystemStorage(location=tmp_path))
+
+    def test_download_export(self, admin_client, product):
+        """Test that a completed export is served through the admin endpoint."""
+        from apps.products.models import ProductExport
+        from apps.products.tasks import export_products_csv
+
+        export = ProductExport.objects.create()
+        export_products_csv(export.pk)
+
+        export_url = f"/api/v1/products/admin/products/exports/{export.pk}/"
+        response = admin_client.get(export_url)
+        url = response.data["data"]["url"]
+        assert url.endswith(f"{export_url}download/")
+
+        response = admin_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert product.sku in b"".join(response.streaming_content).decode()
+
+    def test_download_export_requires_admin(self, authenticated_client, product):
+        """Test that regular users cannot download exports."""
+        from apps.products.models import ProductExport
+        from apps.products.tasks import export_products_csv
+
+        export = ProductExport.objects.create()
+        export_products_csv(export.pk)
+
+        response = authenticated_client.get(
+            f"/api/v1/products/admin/products/exports/{export.pk}/download/"
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_stale_processing_export_fails(self, admin_client):
+        """Test that an export stuck in processing is reported as failed."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from apps.products.models import ProductExport
+
+        export = ProductExport.objects.create(status="processing")
+        ProductExport.objects.filter(pk=export.pk).update(
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+
+        response = admin_client.get(
+            f"/api/v1/products/admin/products/exports/{export.pk}/"
+        )
+
+        assert response.data["data"]["status"] == "failed"
+        export.refresh_from_db()
+        assert export.status == "failed"
+
 
 @pytest.mark.django_db
 class TestProductModel:
@@ -124,6 +301,27 @@ class TestProductModel:
         
         assert product.current_price == Decimal("100.00")
 
+    def test_admin_form_switches_primary_image(self, product):
+        """Test that an image form can take over as the primary image."""
+        from django.forms import modelform_factory
+
+        from apps.products.models import ProductImage
+
+        first = ProductImage.objects.create(
+            product=product, image="products/a.jpg", is_primary=True
+        )
+        second = ProductImage.objects.create(product=product, image="products/b.jpg")
+        form_class = modelform_factory(ProductImage, fields=["product", "is_primary"])
+        form = form_class(
+            data={"product": product.pk, "is_primary": "on"}, instance=second
+        )
+
+        assert form.is_valid(), form.errors
+        form.save()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert second.is_primary and not first.is_primary
+
     def test_product_str(self, product):
         """Test product string representation."""
         assert str(product) == product.name